@@ -0,0 +1,93 @@
+"""
+\********************************************************************************
+* Copyright (c) 2023 the Qrisp authors
+*
+* This program and the accompanying materials are made available under the
+* terms of the Eclipse Public License 2.0 which is available at
+* http://www.eclipse.org/legal/epl-2.0.
+*
+* This Source Code may also be made available under the following Secondary
+* Licenses when the conditions for such availability set forth in the Eclipse
+* Public License, v. 2.0 are satisfied: GNU General Public License, version 2
+* with the GNU Classpath Exception which is
+* available at https://www.gnu.org/software/classpath/license.html.
+*
+* SPDX-License-Identifier: EPL-2.0 OR GPL-2.0 WITH Classpath-exception-2.0
+********************************************************************************/
+"""
+
+# Benchmark of QuantumCircuit.__hash__. The previous implementation (reproduced below
+# for comparison) determined the qubit indices of each instruction by iterating over
+# all qubits of the circuit, ie. it scaled like O(gates * qubits).
+
+import time
+
+import numpy as np
+
+from qrisp import QuantumCircuit
+
+
+def previous_hash(qc):
+    res = 0
+    n = len(qc.qubits)
+    for i in range(len(qc.data)):
+        instr = qc.data[i]
+
+        qubit_indices = {}
+        for j in range(n):
+            try:
+                qubit_indices[instr.qubits.index(qc.qubits[j])] = j
+            except ValueError:
+                pass
+
+        qubit_indices = [qubit_indices[j] for j in range(len(instr.qubits))]
+        index_hash = hash(tuple(qubit_indices))
+
+        params = []
+        for j in range(len(instr.op.params)):
+            params.append(hash((instr.op.params[j], i)))
+        param_hash = hash(tuple(params))
+
+        if instr.op.definition:
+            op_hash = previous_hash(instr.op.definition)
+        else:
+            op_hash = hash(instr.op.name)
+
+        res += hash((index_hash, param_hash, op_hash)) * (i + 1) ** 2
+
+    res *= len(qc.qubits) ** 2
+    return hash(res)
+
+
+def random_circuit(qubit_amount, gate_amount):
+    rng = np.random.default_rng(0)
+
+    qc = QuantumCircuit(qubit_amount)
+    for i in range(gate_amount // 2):
+        a, b = rng.choice(qubit_amount, 2, replace=False)
+        qc.rz(rng.random(), int(a))
+        qc.cx(int(a), int(b))
+    return qc
+
+
+def main():
+    for qubit_amount, gate_amount in [(50, 10**4), (200, 10**4), (500, 10**5)]:
+        qc = random_circuit(qubit_amount, gate_amount)
+
+        t0 = time.perf_counter()
+        previous_hash(qc)
+        old = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        hash(qc)
+        new = time.perf_counter() - t0
+
+        print(
+            f"{qubit_amount:4} qubits | {gate_amount:7} gates | "
+            f"previous: {old:7.3f} s | current: {new:7.3f} s",
+            flush=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+\********************************************************************************
+* Copyright (c) 2023 the Qrisp authors
+*
+* This program and the accompanying materials are made available under the
+* terms of the Eclipse Public License 2.0 which is available at
+* http://www.eclipse.org/legal/epl-2.0.
+*
+* This Source Code may also be made available under the following Secondary
+* Licenses when the conditions for such availability set forth in the Eclipse
+* Public License, v. 2.0 are satisfied: GNU General Public License, version 2
+* with the GNU Classpath Exception which is
+* available at https://www.gnu.org/software/classpath/license.html.
+*
+* SPDX-License-Identifier: EPL-2.0 OR GPL-2.0 WITH Classpath-exception-2.0
+********************************************************************************/
+"""
+
+# Benchmark of the compilation cache. We compare two workflows: compiling the same
+# session repeatedly (for instance repeated calls of get_measurement) and rebuilding
+# a structurally identical session before each compilation (for instance a function
+# creating a session that is called in a loop). In both cases only the first
+# compilation runs the qompiler, the following ones are retrieved from the cache.
+
+import time
+
+from qrisp import QuantumFloat, compilation_cache
+
+
+def build_session(size):
+    a = QuantumFloat(size)
+    b = QuantumFloat(size)
+    a[:] = 3
+    b[:] = 2
+    a += b
+    c = a + b
+    d = c < 5
+    return d.qs
+
+
+def time_compilations(sessions, enabled):
+    compilation_cache.clear()
+    compilation_cache.enabled = enabled
+
+    t0 = time.perf_counter()
+    for qs in sessions:
+        qs.compile()
+    duration = time.perf_counter() - t0
+
+    compilation_cache.enabled = True
+    return duration
+
+
+def main():
+    repetitions = 10
+
+    for size in [4, 8, 12]:
+        # Repeated compilation of the same session (for instance repeated calls of
+        # get_measurement)
+        qs = build_session(size)
+        old = time_compilations([qs] * repetitions, False)
+        new = time_compilations([qs] * repetitions, True)
+
+        print(
+            f"size {size:2} | same session    | {repetitions} compilations | "
+            f"without cache: {old:6.2f} s | with cache: {new:6.2f} s",
+            flush=True,
+        )
+
+        # Compilation of structurally identical sessions
+        sessions = [build_session(size) for i in range(repetitions)]
+        old = time_compilations(sessions, False)
+        new = time_compilations(sessions, True)
+
+        print(
+            f"size {size:2} | rebuilt session | {repetitions} compilations | "
+            f"without cache: {old:6.2f} s | with cache: {new:6.2f} s",
+            flush=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+\********************************************************************************
+* Copyright (c) 2023 the Qrisp authors
+*
+* This program and the accompanying materials are made available under the
+* terms of the Eclipse Public License 2.0 which is available at
+* http://www.eclipse.org/legal/epl-2.0.
+*
+* This Source Code may also be made available under the following Secondary
+* Licenses when the conditions for such availability set forth in the Eclipse
+* Public License, v. 2.0 are satisfied: GNU General Public License, version 2
+* with the GNU Classpath Exception which is
+* available at https://www.gnu.org/software/classpath/license.html.
+*
+* SPDX-License-Identifier: EPL-2.0 OR GPL-2.0 WITH Classpath-exception-2.0
+********************************************************************************/
+"""
+
+# Benchmark of the multithreaded tensor contractions of the simulator. We simulate a
+# dense state (a QFT of a uniform superposition followed by layers of rotations) using
+# different amounts of threads.
+
+# Pass the amount of qubits as the first argument (default: 24).
+
+import os
+import sys
+import time
+
+from qrisp import QuantumVariable, QFT, h, rx, cx
+from qrisp.simulator import run, set_simulator_threads
+
+
+def dense_circuit(qubit_amount):
+    qv = QuantumVariable(qubit_amount)
+    h(qv)
+    QFT(qv)
+    for layer in range(2):
+        for i in range(qubit_amount):
+            rx(0.1 * (i + 1), qv[i])
+        for i in range(qubit_amount - 1):
+            cx(qv[i], qv[i + 1])
+
+    qc = qv.qs.compile()
+    qc.measure(qc.qubits)
+    return qc
+
+
+def main():
+    qubit_amount = int(sys.argv[1]) if len(sys.argv) > 1 else 24
+    qc = dense_circuit(qubit_amount)
+
+    thread_amounts = sorted({1, 2, 4, os.cpu_count() or 1})
+
+    for thread_amount in thread_amounts:
+        set_simulator_threads(thread_amount)
+
+        # Trigger numba compilation and threshold calibration
+        run(dense_circuit(8), 10)
+
+        t0 = time.perf_counter()
+        run(qc, 1000)
+        duration = time.perf_counter() - t0
+
+        print(
+            f"{qubit_amount} qubits | {len(qc.transpile().data)} gates | "
+            f"{thread_amount:3} threads | {duration:7.2f} s",
+            flush=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+\********************************************************************************
+* Copyright (c) 2023 the Qrisp authors
+*
+* This program and the accompanying materials are made available under the
+* terms of the Eclipse Public License 2.0 which is available at
+* http://www.eclipse.org/legal/epl-2.0.
+*
+* This Source Code may also be made available under the following Secondary
+* Licenses when the conditions for such availability set forth in the Eclipse
+* Public License, v. 2.0 are satisfied: GNU General Public License, version 2
+* with the GNU Classpath Exception which is
+* available at https://www.gnu.org/software/classpath/license.html.
+*
+* SPDX-License-Identifier: EPL-2.0 OR GPL-2.0 WITH Classpath-exception-2.0
+********************************************************************************/
+"""
+
+# Benchmark of a single optimizer step of QAOA (MaxCut), ie. the evaluation of the
+# compiled parametrized circuit for new parameter values. We compare binding via
+# QuantumCircuit.bind_parameters (the previous behavior of the optimization routine)
+# with binding via a ParametricTemplate.
+
+import time
+
+import networkx as nx
+import numpy as np
+
+from qrisp import QuantumVariable, ParametricTemplate
+from qrisp.qaoa import (
+    QAOAProblem,
+    RX_mixer,
+    create_maxcut_cost_operator,
+    create_maxcut_cl_cost_function,
+)
+
+
+def time_steps(qarg, qc, symbols, steps):
+    durations = []
+    for _ in range(steps):
+        theta = np.random.rand(len(symbols))
+        subs_dic = {symbols[i]: theta[i] for i in range(len(symbols))}
+        t0 = time.perf_counter()
+        qarg.get_measurement(subs_dic=subs_dic, precompiled_qc=qc)
+        durations.append(time.perf_counter() - t0)
+    return np.median(durations)
+
+
+def main():
+    for nodes, depth in [(8, 3), (12, 5), (16, 5)]:
+        G = nx.erdos_renyi_graph(nodes, 0.5, seed=1)
+        qarg = QuantumVariable(nodes)
+        problem = QAOAProblem(
+            create_maxcut_cost_operator(G),
+            RX_mixer,
+            create_maxcut_cl_cost_function(G),
+        )
+        qc, symbols = problem.compile_circuit(qarg, depth)
+
+        t0 = time.perf_counter()
+        template = ParametricTemplate(qc, symbols)
+        template_creation = time.perf_counter() - t0
+
+        # Warm up (numba compilation and the preprocessing of the template)
+        time_steps(qarg, qc, symbols, 1)
+        time_steps(qarg, template, symbols, 1)
+
+        old = time_steps(qarg, qc, symbols, 10)
+        new = time_steps(qarg, template, symbols, 10)
+
+        print(
+            f"{nodes:3} qubits | depth {depth} | {len(qc.data):5} gates | "
+            f"bind_parameters: {1e3*old:8.1f} ms/step | "
+            f"template: {1e3*new:8.1f} ms/step | "
+            f"template creation: {1e3*template_creation:8.1f} ms",
+            flush=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
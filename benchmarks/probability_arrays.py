@@ -0,0 +1,65 @@
+"""
+\********************************************************************************
+* Copyright (c) 2023 the Qrisp authors
+*
+* This program and the accompanying materials are made available under the
+* terms of the Eclipse Public License 2.0 which is available at
+* http://www.eclipse.org/legal/epl-2.0.
+*
+* This Source Code may also be made available under the following Secondary
+* Licenses when the conditions for such availability set forth in the Eclipse
+* Public License, v. 2.0 are satisfied: GNU General Public License, version 2
+* with the GNU Classpath Exception which is
+* available at https://www.gnu.org/software/classpath/license.html.
+*
+* SPDX-License-Identifier: EPL-2.0 OR GPL-2.0 WITH Classpath-exception-2.0
+********************************************************************************/
+"""
+
+# Benchmark of the array result mode (get_measurement(return_arrays = True)) against
+# the dictionary result mode for the evaluation of the MaxCut cost function. The state
+# is a uniform superposition over all outcomes, ie. the amount of outcomes is maximal.
+# Note that the dictionary result mode rounds the probabilities to multiples of 1E-5,
+# so it can not represent the distribution for more than 16 qubits.
+
+import time
+
+import networkx as nx
+
+from qrisp import QuantumVariable, h, rzz
+from qrisp.qaoa import create_maxcut_cl_cost_function
+
+
+def main():
+    for n in [12, 14, 16]:
+        G = nx.erdos_renyi_graph(n, 0.3, seed = 1)
+        cl_cost_function = create_maxcut_cl_cost_function(G)
+
+        qv = QuantumVariable(n)
+        h(qv)
+        for i, j in G.edges():
+            rzz(0.5, qv[i], qv[j])
+
+        qc = qv.qs.compile(intended_measurements = qv.reg)
+
+        # Trigger the numba compilation before timing
+        cl_cost_function(qv.get_measurement(precompiled_qc = qc))
+        cl_cost_function(qv.get_measurement(precompiled_qc = qc, return_arrays = True))
+
+        t0 = time.perf_counter()
+        old_res = cl_cost_function(qv.get_measurement(precompiled_qc = qc))
+        old = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        new_res = cl_cost_function(qv.get_measurement(precompiled_qc = qc, return_arrays = True))
+        new = time.perf_counter() - t0
+
+        print(
+            f"{n:3} qubits | dictionary: {old:7.3f} s | arrays: {new:7.3f} s | "
+            f"cost difference: {abs(old_res - new_res):.2e}",
+            flush=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
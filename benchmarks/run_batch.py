@@ -0,0 +1,84 @@
+"""
+\********************************************************************************
+* Copyright (c) 2023 the Qrisp authors
+*
+* This program and the accompanying materials are made available under the
+* terms of the Eclipse Public License 2.0 which is available at
+* http://www.eclipse.org/legal/epl-2.0.
+*
+* This Source Code may also be made available under the following Secondary
+* Licenses when the conditions for such availability set forth in the Eclipse
+* Public License, v. 2.0 are satisfied: GNU General Public License, version 2
+* with the GNU Classpath Exception which is
+* available at https://www.gnu.org/software/classpath/license.html.
+*
+* SPDX-License-Identifier: EPL-2.0 OR GPL-2.0 WITH Classpath-exception-2.0
+********************************************************************************/
+"""
+
+# Benchmark of qrisp.simulator.run_batch against individual simulations of the bound
+# circuits. The circuit consists of a parameter independent state preparation
+# (a multiplication of two QuantumFloats in superposition) followed by a layer of
+# parametrized rotations and measurements, ie. a typical grid search setting.
+
+# Pass the amount of worker processes as the first argument (default: 1).
+
+import sys
+import time
+
+import numpy as np
+from sympy import Symbol
+
+from qrisp import QuantumFloat, h, rx, rz, cx
+from qrisp.simulator import run, run_batch
+
+
+def sweep_circuit(size):
+    a = QuantumFloat(size)
+    b = QuantumFloat(size)
+    h(a)
+    h(b)
+    c = a * b
+
+    symbols = [Symbol("theta_" + str(i)) for i in range(len(c))]
+    for i in range(len(c)):
+        rx(symbols[i], c[i])
+    for i in range(len(c) - 1):
+        cx(c[i], c[i + 1])
+    rz(symbols[0] + symbols[-1], c[0])
+
+    qc = c.qs.compile()
+    qc.measure(c.reg)
+    return qc, symbols
+
+
+def main():
+    processes = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    batch_size = 20
+
+    for size in [3, 4, 5]:
+        qc, symbols = sweep_circuit(size)
+        parameters = np.random.rand(batch_size, len(symbols)) * 2 * np.pi
+
+        # Trigger the numba compilation before timing
+        run(qc.bind_parameters(dict(zip(symbols, parameters[0]))), 1000)
+
+        t0 = time.perf_counter()
+        for theta in parameters:
+            run(qc.bind_parameters(dict(zip(symbols, theta))), 1000)
+        old = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        run_batch(qc, parameters, 1000, symbols=symbols, processes=processes)
+        new = time.perf_counter() - t0
+
+        print(
+            f"{len(qc.qubits):3} qubits | {len(qc.transpile().data):5} gates | "
+            f"batch size {batch_size} | individual runs: {old:7.2f} s | "
+            f"run_batch: {new:7.2f} s",
+            flush=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
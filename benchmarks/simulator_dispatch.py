@@ -0,0 +1,91 @@
+"""
+\********************************************************************************
+* Copyright (c) 2023 the Qrisp authors
+*
+* This program and the accompanying materials are made available under the
+* terms of the Eclipse Public License 2.0 which is available at
+* http://www.eclipse.org/legal/epl-2.0.
+*
+* This Source Code may also be made available under the following Secondary
+* Licenses when the conditions for such availability set forth in the Eclipse
+* Public License, v. 2.0 are satisfied: GNU General Public License, version 2
+* with the GNU Classpath Exception which is
+* available at https://www.gnu.org/software/classpath/license.html.
+*
+* SPDX-License-Identifier: EPL-2.0 OR GPL-2.0 WITH Classpath-exception-2.0
+********************************************************************************/
+"""
+
+# Benchmark of the simulator entry points (run and statevector_sim) on large
+# arithmetic circuits. The circuits are chains of Cuccaro additions, ie. they consist
+# of X, CX and CCX gates only. Since the inputs are classical, the state stays sparse
+# and the runtime is dominated by preprocessing and per-gate dispatch instead of
+# the numerics.
+
+# To compare two versions, execute this script with PYTHONPATH pointing to the
+# respective source trees, for instance
+# PYTHONPATH=/path/to/old/src python benchmarks/simulator_dispatch.py
+# PYTHONPATH=src python benchmarks/simulator_dispatch.py
+
+# Passing --quick skips the largest configuration (~200 qubits, ~10^5 gates).
+
+import sys
+import time
+
+from qrisp import QuantumFloat, cuccaro_adder
+from qrisp.simulator import run, statevector_sim
+
+
+def arithmetic_circuit(size, register_amount, repetitions, measure=True):
+    registers = [QuantumFloat(size) for _ in range(register_amount)]
+    for i in range(register_amount):
+        registers[i][:] = i + 1
+
+    for _ in range(repetitions):
+        for i in range(1, register_amount):
+            cuccaro_adder(registers[i], registers[0])
+
+    qc = registers[0].qs.compile()
+    if measure:
+        qc.measure(registers[0].reg)
+    return qc
+
+
+def time_call(function, *args):
+    t0 = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - t0
+
+
+def main():
+    configurations = [(5, 2, 4), (10, 4, 5), (20, 4, 5), (50, 4, 20)]
+    if "--quick" in sys.argv:
+        configurations = configurations[:-1]
+
+    # Trigger the numba compilation before timing
+    run(arithmetic_circuit(2, 2, 1), 10)
+    statevector_sim(arithmetic_circuit(2, 2, 1, measure=False))
+
+    for size, register_amount, repetitions in configurations:
+        qc = arithmetic_circuit(size, register_amount, repetitions)
+        gate_count = len(qc.transpile().data)
+
+        duration = time_call(run, qc, 1000)
+        print(
+            f"run             | {len(qc.qubits):4} qubits | {gate_count:7} gates | "
+            f"{duration:8.2f} s | {1e6*duration/gate_count:8.1f} us/gate",
+            flush=True,
+        )
+
+        if len(qc.qubits) <= 24:
+            qc = arithmetic_circuit(size, register_amount, repetitions, measure=False)
+            duration = time_call(statevector_sim, qc)
+            print(
+                f"statevector_sim | {len(qc.qubits):4} qubits | {gate_count:7} gates | "
+                f"{duration:8.2f} s | {1e6*duration/gate_count:8.1f} us/gate",
+                flush=True,
+            )
+
+
+if __name__ == "__main__":
+    main()
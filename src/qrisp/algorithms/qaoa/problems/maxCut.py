@@ -60,12 +60,19 @@ def create_maxcut_cl_cost_function(G):
     -------
     cl_cost_function : function
         The classical cost function for the problem instance, which takes a dictionary of measurement results as input.
+        Alternatively, the measurement results can be given as a tuple of NumPy arrays ``(outcomes, probabilities)`` 
+        as returned by ``get_measurement(return_arrays = True)``.
 
     """    
     def cl_cost_function(counts):
         
         edge_list = np.array(list(G.edges()), dtype = np.uint32)
         
+        # The integer labels of the outcomes can be processed directly
+        if isinstance(counts, tuple):
+            outcome_array, probability_array = counts
+            return maxcut_energy(outcome_array.astype(np.int64), probability_array, edge_list)
+        
         counts_keys = list(counts.keys())
         
         int_list = []
@@ -84,6 +91,9 @@ def create_maxcut_cl_cost_function(G):
         
         return maxcut_energy(outcome_array, counts_array, edge_list)
     
+    # Indicates that QAOAProblem can evaluate this function on measurement arrays
+    cl_cost_function.accepts_arrays = True
+    
     return cl_cost_function
 
 
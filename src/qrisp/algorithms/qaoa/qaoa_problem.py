@@ -22,7 +22,7 @@ import numpy as np
 from scipy.optimize import minimize
 from sympy import Symbol
 
-from qrisp import QuantumArray, h, x, parallelize_qc
+from qrisp import QuantumArray, QuantumVariable, h, x, parallelize_qc, ParametricTemplate
 from qrisp.algorithms.qaoa.qaoa_benchmark_data import QAOABenchmark
 
 
@@ -322,7 +322,7 @@ class QAOAProblem:
             ----------
             theta : list
                 The list of angle parameters gamma and beta for the QAOA circuit.
-            qc : :ref:`QuantumCircuit
+            qc : ParametricTemplate
                 The compiled quantum circuit.
             symbols : list
                 The list of symbols used in the quantum circuit.
@@ -338,7 +338,12 @@ class QAOAProblem:
             """         
             subs_dic = {symbols[i] : theta[i] for i in range(len(symbols))}
             
-            res_dic = qarg.get_measurement(subs_dic = subs_dic, precompiled_qc = qc, **mes_kwargs)
+            # Classical cost functions that accept the measurement results as arrays
+            # of integer outcomes and probabilities skip the result dictionary
+            if isinstance(qarg, QuantumVariable) and getattr(self.cl_cost_function, "accepts_arrays", False):
+                res_dic = qarg.get_measurement(subs_dic = subs_dic, precompiled_qc = qc, return_arrays = True, **mes_kwargs)
+            else:
+                res_dic = qarg.get_measurement(subs_dic = subs_dic, precompiled_qc = qc, **mes_kwargs)
             
             cl_cost = self.cl_cost_function(res_dic)
 
@@ -364,7 +369,7 @@ class QAOAProblem:
             ----------
             p : int
                 The number of partitions for the time interval.
-            qc : :ref:`QuantumCircuit`
+            qc : ParametricTemplate
                 The quantum circuit for the specific problem instance.
             symbols : list
                 The list of symbols in the quantum circuit.
@@ -394,6 +399,10 @@ class QAOAProblem:
 
         compiled_qc, symbols = self.compile_circuit(qarg, depth)
         
+        # The parametric template allows to bind the parameters in every iteration
+        # without sympy substitution and recompilation
+        template = ParametricTemplate(compiled_qc, symbols)
+        
         # Set initial random values for optimization parameters 
         # init_point = np.pi * np.random.rand(2 * depth)/2
         
@@ -405,18 +414,15 @@ class QAOAProblem:
 
         elif self.init_type=='tqa':
             # TQA initialization
-            init_point = tqa_angles(depth,compiled_qc, symbols, qarg, mes_kwargs)
+            init_point = tqa_angles(depth, template, symbols, qarg, mes_kwargs)
 
 
-        # Perform optimization using COBYLA method
-
-        compiled_qc, symbols = self.compile_circuit(qarg, depth)
         # Perform optimization using COBYLA method
         res_sample = minimize(optimization_wrapper,
                             init_point, 
                             method=optimizer, 
                             options={'maxiter':max_iter}, 
-                            args = (compiled_qc, symbols, qarg, mes_kwargs))
+                            args = (template, symbols, qarg, mes_kwargs))
             
         return res_sample['x']
         
@@ -22,7 +22,7 @@ import numpy as np
 from scipy.optimize import minimize
 from sympy import Symbol
 
-from qrisp import QuantumArray
+from qrisp import QuantumArray, ParametricTemplate
 from qrisp.algorithms.vqe.vqe_benchmark_data import VQEBenchmark
 from qrisp.operators.qubit.measurement import QubitOperatorMeasurement
 from qrisp.operators.fermionic import FermionicOperator
@@ -219,7 +219,7 @@ class VQEProblem:
             ----------
             theta : list
                 The list of angle parameters for the VQE circuit.
-            qc : QuantumCircuit
+            qc : ParametricTemplate
                 The compiled quantum circuit.
             symbols : list
                 The list of symbols used in the quantum circuit.
@@ -260,11 +260,16 @@ class VQEProblem:
 
         # Perform optimization using specified method
         compiled_qc, symbols = self.compile_circuit(qarg, depth)
+        
+        # The parametric template allows to bind the parameters in every iteration
+        # without sympy substitution and recompilation
+        template = ParametricTemplate(compiled_qc, symbols)
+        
         res_sample = minimize(optimization_wrapper,
                                 init_point, 
                                 method=optimizer,
                                 options={'maxiter':max_iter}, 
-                                args = (compiled_qc, symbols, qarg, measurement_data, mes_kwargs))
+                                args = (template, symbols, qarg, measurement_data, mes_kwargs))
             
         return res_sample['x']
 
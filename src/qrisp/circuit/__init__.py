@@ -27,3 +27,4 @@ from qrisp.circuit.standard_operations import *
 from qrisp.circuit.controlled_operations import *
 
 
+from qrisp.circuit.parametric_template import *
@@ -0,0 +1,481 @@
+"""
+\********************************************************************************
+* Copyright (c) 2023 the Qrisp authors
+*
+* This program and the accompanying materials are made available under the
+* terms of the Eclipse Public License 2.0 which is available at
+* http://www.eclipse.org/legal/epl-2.0.
+*
+* This Source Code may also be made available under the following Secondary
+* Licenses when the conditions for such availability set forth in the Eclipse
+* Public License, v. 2.0 are satisfied: GNU General Public License, version 2
+* with the GNU Classpath Exception which is
+* available at https://www.gnu.org/software/classpath/license.html.
+*
+* SPDX-License-Identifier: EPL-2.0 OR GPL-2.0 WITH Classpath-exception-2.0
+********************************************************************************/
+"""
+
+import numpy as np
+from sympy.core.expr import Expr
+
+from qrisp.circuit.instruction import Instruction
+from qrisp.circuit.operation import Operation, U3Gate
+
+
+# Variational algorithms like QAOA or VQE evaluate the same parametrized circuit for
+# many different parameter values. Binding the parameters via
+# QuantumCircuit.bind_parameters performs a sympy substitution for every gate,
+# which is why this class analyzes the (transpiled) circuit once:
+# Almost every parametrized gate is a U3Gate whose parameters are affine functions
+# of the symbols. For these gates, we store the coefficients in a matrix such that
+# binding the parameters of all gates is a single matrix-vector product (the unitaries
+# are then also computed in a vectorized manner). Other parametrized operations are
+# bound via their bind_parameters method.
+
+# For the default simulator, the preprocessing of the circuit (grouping etc.) is
+# also performed only once (compare qrisp.simulator.PreparedCircuit). Binding then
+# only replaces the grouped operations that contain parametrized gates. The
+# unitaries of the remaining groups are computed in the first execution and reused.
+class ParametricTemplate:
+    """
+    This class describes a parametrized :ref:`QuantumCircuit`, which has been analyzed
+    such that binding the parameters to numerical values is cheap. Parametric templates
+    can be given to the ``precompiled_qc`` keyword of
+    :meth:`get_measurement <qrisp.QuantumVariable.get_measurement>`.
+    If executed on the default simulator, the circuit preprocessing of the simulator
+    is also performed only once.
+
+    Parameters
+    ----------
+    qc : QuantumCircuit
+        The parametrized QuantumCircuit.
+    symbols : list[sympy.Symbol], optional
+        The parameters of the circuit. The order of this list determines the order of
+        parameter arrays given to the :meth:`bind <ParametricTemplate.bind>` method.
+        By default, the parameters of ``qc`` are sorted by name.
+
+    Examples
+    --------
+
+    >>> import numpy as np
+    >>> from qrisp import QuantumFloat, h, rz, ParametricTemplate
+    >>> from sympy import Symbol
+    >>> qf = QuantumFloat(2)
+    >>> phi = Symbol("phi")
+    >>> h(qf)
+    >>> rz(2*phi, qf[0])
+    >>> h(qf)
+    >>> template = ParametricTemplate(qf.qs.compile(), [phi])
+    >>> qf.get_measurement(subs_dic = {phi : np.pi/4}, precompiled_qc = template)
+    {0: 0.5, 1: 0.5}
+
+    """
+
+    def __init__(self, qc, symbols=None):
+
+        self.qc = qc.transpile()
+
+        if symbols is None:
+            symbols = set()
+            for instr in self.qc.data:
+                symbols = symbols.union(instr.op.abstract_params)
+            symbols = sorted(symbols, key=str)
+
+        self.symbols = list(symbols)
+        symbol_indices = {self.symbols[i]: i for i in range(len(self.symbols))}
+
+        # List of the parametrized operations. Each operation object is only
+        # contained once, even if it appears in several instructions.
+        self.param_ops = []
+        self.op_indices = {}
+
+        # List of tuples (i, k) indicating that the i-th instruction of self.qc
+        # contains the k-th parametrized operation
+        self.instr_positions = []
+
+        # The k-th parametrized operation is bound via the affine_indices[k]-th row
+        # of the coefficient matrix. Operations that are not affine U3Gates are
+        # indicated by -1.
+        self.affine_indices = []
+        coefficient_rows = []
+        offsets = []
+
+        for i in range(len(self.qc.data)):
+            op = self.qc.data[i].op
+
+            if not op.abstract_params:
+                continue
+
+            if id(op) not in self.op_indices:
+                self.op_indices[id(op)] = len(self.param_ops)
+                self.param_ops.append(op)
+
+                affine_rep = None
+                if isinstance(op, U3Gate):
+                    affine_rep = affine_representation(
+                        [op.theta, op.phi, op.lam, op.global_phase], symbol_indices
+                    )
+
+                if affine_rep is None:
+                    for symb in op.abstract_params:
+                        if symb not in symbol_indices:
+                            raise Exception(
+                                f"Operation {op.name} contains unspecified parameter {symb}"
+                            )
+                    self.affine_indices.append(-1)
+                else:
+                    self.affine_indices.append(len(coefficient_rows))
+                    coefficient_rows.append(affine_rep[0])
+                    offsets.append(affine_rep[1])
+
+            self.instr_positions.append((i, self.op_indices[id(op)]))
+
+        # The coefficient matrix has the shape (4*m, n) where m is the amount of affine
+        # U3Gates and n the amount of symbols. The four rows of each gate describe
+        # theta, phi, lambda and the global phase.
+        if coefficient_rows:
+            self.coefficients = np.concatenate(coefficient_rows)
+            self.offsets = np.concatenate(offsets)
+        else:
+            self.coefficients = np.zeros((0, len(self.symbols)))
+            self.offsets = np.zeros(0)
+
+        # Dictionary of preprocessed simulator circuits. The keys are tuples
+        # describing the measured qubits and the basis change.
+        self.prepared_circuits = {}
+
+    # Converts a substitution dictionary or a sequence of values into a numpy array
+    # ordered like self.symbols
+    def get_parameter_array(self, theta):
+        if isinstance(theta, dict):
+            try:
+                theta = [theta[symb] for symb in self.symbols]
+            except KeyError as e:
+                raise Exception(f"No value specified for parameter {e.args[0]}")
+
+        theta = np.array(theta, dtype=np.float64).flatten()
+
+        if len(theta) != len(self.symbols):
+            raise Exception(
+                f"Tried to bind {len(theta)} values to template with "
+                f"{len(self.symbols)} parameters"
+            )
+
+        return theta
+
+    def bind_operations(self, theta):
+        """
+        Returns the list of the bound parametrized operations.
+
+        Parameters
+        ----------
+        theta : numpy.ndarray or dict
+            The parameter values (ordered like the ``symbols`` attribute) or a
+            dictionary of the type {sympy.Symbol : float}.
+
+        Returns
+        -------
+        list[Operation]
+            The bound operations (ordered like the ``param_ops`` attribute).
+
+        """
+        from qrisp.simulator.unitary_management import u3matrix_batch
+
+        theta = self.get_parameter_array(theta)
+
+        values = (self.coefficients @ theta + self.offsets).reshape(-1, 4)
+        unitaries = u3matrix_batch(
+            values[:, 0], values[:, 1], values[:, 2], values[:, 3]
+        )
+        values = values.tolist()
+
+        subs_dic = None
+        res = []
+        for k in range(len(self.param_ops)):
+            op = self.param_ops[k]
+            j = self.affine_indices[k]
+
+            if j == -1:
+                if subs_dic is None:
+                    subs_dic = {
+                        self.symbols[i]: theta[i] for i in range(len(self.symbols))
+                    }
+                res.append(op.bind_parameters(subs_dic))
+                continue
+
+            theta_j, phi_j, lam_j, global_phase_j = values[j]
+
+            bound_op = U3Gate(theta_j, phi_j, lam_j, op.name, global_phase_j)
+            bound_op.unitary = unitaries[j]
+
+            bound_op.permeability = dict(op.permeability)
+            bound_op.is_qfree = op.is_qfree
+
+            res.append(bound_op)
+
+        return res
+
+    def bind(self, theta):
+        """
+        Returns the QuantumCircuit with the parameters bound to the given values.
+
+        Parameters
+        ----------
+        theta : numpy.ndarray or dict
+            The parameter values (ordered like the ``symbols`` attribute) or a
+            dictionary of the type {sympy.Symbol : float}.
+
+        Returns
+        -------
+        QuantumCircuit
+            The bound (transpiled) QuantumCircuit.
+
+        """
+        bound_ops = self.bind_operations(theta)
+
+        res = self.qc.copy()
+        res.abstract_params = set()
+
+        for i, k in self.instr_positions:
+            instr = res.data[i]
+            res.data[i] = Instruction(bound_ops[k], instr.qubits, instr.clbits)
+
+        return res
+
+    def get_measurement(
+        self,
+        theta,
+        qubits,
+        backend,
+        shots=None,
+        circuit_preprocessor=None,
+        basis_change=None,
+        return_arrays=False,
+    ):
+        """
+        Measures the given qubits of the bound circuit. Returns the same type of
+        result as ``qrisp.misc.get_measurement_from_qc``, ie. integer outcomes
+        and normalized counts.
+
+        Parameters
+        ----------
+        theta : numpy.ndarray or dict
+            The parameter values.
+        qubits : list[Qubit]
+            The qubits to measure.
+        backend : BackendClient
+            The backend to execute the circuit on.
+        shots : int, optional
+            The amount of shots. The default is given by the backend.
+        circuit_preprocessor : Python function, optional
+            A function which recieves a QuantumCircuit and returns one, which is applied
+            to the bound circuit. The default is None.
+        basis_change : Operation, optional
+            An Operation that is applied to the first qubits of ``qubits`` before the
+            measurement. The default is None.
+        return_arrays : bool, optional
+            If set to True, the results are returned as a tuple of NumPy arrays
+            (outcomes, probabilities) instead of a dictionary. The default is False.
+
+        Returns
+        -------
+        dict or tuple[numpy.ndarray, numpy.ndarray]
+            The measurement results.
+
+        """
+        from qrisp.default_backend import DefaultBackend
+        from qrisp.misc import get_measurement_from_qc, process_counts, process_arrays
+
+        if not isinstance(backend, DefaultBackend) or circuit_preprocessor is not None:
+            from qrisp.core.compilation import combine_single_qubit_gates
+
+            qc = combine_single_qubit_gates(self.bind(theta))
+
+            if basis_change is not None:
+                qc.append(basis_change, qubits[: basis_change.num_qubits])
+
+            if circuit_preprocessor is not None:
+                qc = circuit_preprocessor(qc)
+
+            return get_measurement_from_qc(
+                qc.transpile(), list(qubits), backend, shots, return_arrays
+            )
+
+        key = (tuple(qubits), id(basis_change))
+
+        if key not in self.prepared_circuits:
+            self.prepared_circuits[key] = PreparedTemplate(self, qubits, basis_change)
+
+        prepared_template = self.prepared_circuits[key]
+
+        if return_arrays:
+            outcome_array, probability_array = prepared_template.run(
+                self.bind_operations(theta), shots, return_arrays=True
+            )
+
+            # The measured qubits belong to the most significant bits of the outcomes
+            shift = len(prepared_template.prepared_qc.mes_list) - len(qubits)
+
+            return process_arrays(outcome_array, probability_array, shift)
+
+        counts = prepared_template.run(self.bind_operations(theta), shots)
+
+        return process_counts(counts, len(qubits))
+
+
+# This class holds the simulator preprocessing of a template (including measurements)
+# together with the information which grouped operations of the preprocessed circuit
+# need to be rebuilt after binding. If qubits is None, the circuit of the template is
+# simulated as it is (ie. it should contain measurements).
+class PreparedTemplate:
+    def __init__(self, template, qubits=None, basis_change=None):
+        from qrisp.simulator import PreparedCircuit
+
+        qc = template.qc.copy()
+
+        if basis_change is not None:
+            qc.append(basis_change, qubits[: basis_change.num_qubits])
+
+        if qubits is not None:
+            cl = [qc.add_clbit() for _ in range(len(qubits))]
+            for i in range(len(qubits)):
+                qc.measure(qubits[i], cl[i])
+
+        self.prepared_qc = PreparedCircuit(qc)
+
+        # The basis change is kept alive, since its id is part of the key in
+        # template.prepared_circuits
+        self.basis_change = basis_change
+
+        op_indices = template.op_indices
+        lowered_qc = self.prepared_qc.lowered_qc
+        op_list = lowered_qc.op_list
+
+        # List of tuples (slot, k, positions) where slot is the position of an
+        # operation in op_list, which depends on the parametrized operation k (if it
+        # is the parametrized operation itself, positions is None). Otherwise,
+        # positions is a list of tuples (j, k) indicating that the j-th instruction
+        # of the definition of the operation contains the k-th parametrized
+        # operation.
+        self.param_slots = []
+
+        for slot in range(len(op_list)):
+            op = op_list[slot]
+
+            if id(op) in op_indices:
+                self.param_slots.append((slot, op_indices[id(op)], None))
+                continue
+
+            # Note that the grouped operations created by the simulator don't keep
+            # track of the abstract parameters, so we have to check the definition
+            if op.definition is None:
+                continue
+
+            positions = []
+            data = op.definition.data
+            for j in range(len(data)):
+                if id(data[j].op) in op_indices:
+                    positions.append((j, op_indices[id(data[j].op)]))
+
+            if positions:
+                self.param_slots.append((slot, None, positions))
+
+        # The instructions before the first parametrized instruction are the same for
+        # every parameter value. We simulate them only once and start every run with
+        # a copy of the resulting state.
+        param_slot_set = set(slot for slot, _, _ in self.param_slots)
+
+        self.prefix_length = len(lowered_qc)
+        for i in range(len(lowered_qc)):
+            if lowered_qc.param_slots[i] in param_slot_set:
+                self.prefix_length = i
+                break
+
+        self.prefix_state = None
+
+    # Returns the op_list of the lowered circuit where the operations depending on the
+    # parameters are replaced by their bound counterparts
+    def get_op_list(self, bound_ops):
+        op_list = list(self.prepared_qc.lowered_qc.op_list)
+
+        for slot, k, positions in self.param_slots:
+            if positions is None:
+                op_list[slot] = bound_ops[k]
+                continue
+
+            op = op_list[slot]
+
+            definition = op.definition.copy()
+            definition.abstract_params = set()
+
+            for j, k in positions:
+                instr = definition.data[j]
+                definition.data[j] = Instruction(bound_ops[k], instr.qubits, instr.clbits)
+
+            op_list[slot] = Operation(
+                name=op.name,
+                num_qubits=op.num_qubits,
+                num_clbits=op.num_clbits,
+                definition=definition,
+            )
+
+        return op_list
+
+    def get_prefix_state(self):
+        from qrisp.simulator import QuantumState
+
+        if self.prefix_state is None:
+            prepared_qc = self.prepared_qc
+            self.prefix_state = prepared_qc.evolve(
+                QuantumState(len(prepared_qc.qc.qubits)), stop=self.prefix_length
+            )
+
+        return self.prefix_state
+
+    def run(self, bound_ops, shots, return_arrays=False):
+        return self.prepared_qc.run(
+            shots,
+            iqs=self.get_prefix_state().copy(),
+            op_list=self.get_op_list(bound_ops),
+            start=self.prefix_length,
+            return_arrays=return_arrays,
+        )
+
+
+# Returns the coefficients of the affine representation of a list of expressions
+# i.e. a matrix A and a vector b such that expressions = A @ symbols + b
+# If one of the expressions is not affine, None is returned.
+def affine_representation(expressions, symbol_indices):
+    coefficients = np.zeros((len(expressions), len(symbol_indices)))
+    offsets = np.zeros(len(expressions))
+
+    for i in range(len(expressions)):
+        expr = expressions[i]
+
+        if not isinstance(expr, Expr):
+            offsets[i] = float(expr)
+            continue
+
+        free_symbols = expr.free_symbols
+
+        for symb in free_symbols:
+            if symb not in symbol_indices:
+                raise Exception(f"Expression {expr} contains unspecified parameter {symb}")
+
+            derivative = expr.diff(symb)
+
+            if derivative.free_symbols:
+                return None
+
+            try:
+                coefficients[i, symbol_indices[symb]] = float(derivative)
+            except TypeError:
+                return None
+
+        try:
+            offsets[i] = float(expr.subs({symb: 0 for symb in free_symbols}))
+        except TypeError:
+            return None
+
+    return coefficients, offsets
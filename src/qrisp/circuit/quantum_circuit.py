@@ -1616,50 +1616,7 @@ class QuantumCircuit:
         return statevector_sim(self)
 
     def __hash__(self):
-        from hashlib import sha256
-
-        res = 0
-
-        def hash_(x):
-            temp = str(x).encode("utf-8")
-            hex_value = sha256(temp).hexdigest()
-            return int(hex_value, 16)
-
-        transpiled_qc = self
-
-        n = len(self.qubits)
-        for i in range(len(transpiled_qc.data)):
-            instr = transpiled_qc.data[i]
-
-            qubit_indices = {}
-
-            for j in range(n):
-                try:
-                    qubit_indices[instr.qubits.index(self.qubits[j])] = j
-                except ValueError:
-                    pass
-
-            qubit_indices = [qubit_indices[j] for j in range(len(instr.qubits))]
-
-            index_hash = hash(tuple(qubit_indices))
-
-            params = []
-            for j in range(len(instr.op.params)):
-                p = hash((instr.op.params[j], i))
-                params.append(p)
-
-            param_hash = hash(tuple(params))
-
-            if instr.op.definition:
-                op_hash = hash(instr.op.definition)
-            else:
-                op_hash = hash(instr.op.name)
-
-            res += hash((index_hash, param_hash, op_hash)) * (i + 1) ** 2
-
-        res *= len(self.qubits) ** 2
-
-        return hash(res)
+        return circuit_hash(self, {})
 
     @classmethod
     def from_qasm_str(self, qasm_string):
@@ -2401,3 +2358,31 @@ def convert_to_cb_list(input, circuit=None, top_level=True):
 
     return result
 
+
+# Computes the hash of a QuantumCircuit in a single pass over the data.
+# The qubit indices of the instructions are determined using a dictionary and the
+# hashes of the operations are memoized in the memo dictionary (keyed by id) such that
+# the definition of composite operations appearing multiple times (or in the definition
+# of other operations) is only hashed once.
+def circuit_hash(qc, memo):
+    qubit_indices = {qc.qubits[i]: i for i in range(len(qc.qubits))}
+
+    instruction_hashes = []
+    for instr in qc.data:
+        op = instr.op
+
+        try:
+            op_hash = memo[id(op)]
+        except KeyError:
+            if op.definition:
+                op_hash = circuit_hash(op.definition, memo)
+            else:
+                op_hash = hash(op.name)
+            op_hash = hash((op_hash, tuple(op.params)))
+            memo[id(op)] = op_hash
+
+        instruction_hashes.append(
+            hash((op_hash, tuple([qubit_indices[qb] for qb in instr.qubits])))
+        )
+
+    return hash((len(qc.qubits), tuple(instruction_hashes)))
@@ -18,6 +18,7 @@
 
 from qrisp.core.session_merging_tools import *
 from qrisp.core.compilation import *
+from qrisp.core.compilation_caching import CompilationCache, compilation_cache
 from qrisp.core.quantum_variable import QuantumVariable
 from qrisp.core.quantum_session import QuantumSession
 from qrisp.core.quantum_array import QuantumArray, OutcomeArray
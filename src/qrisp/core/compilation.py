@@ -22,6 +22,7 @@ import networkx as nx
 from qrisp.circuit import QuantumCircuit, Operation, Qubit, PTControlledOperation, ControlledOperation, transpile, Instruction, fast_append, RXGate, RYGate, RZGate, PGate, GPhaseGate
 from qrisp.misc import get_depth_dic, retarget_instructions
 from qrisp.permeability import optimize_allocations, parallelize_qc, lightcone_reduction
+from qrisp.core.compilation_caching import compilation_cache
 
 # The purpose of this function is to dynamically (de)allocate qubits when they are
 # needed or not needed anymore. The qompiler function knows when a qubit is ready to
@@ -55,6 +56,24 @@ def qompiler(
     if len(qs.data) == 0:
         return QuantumCircuit(0)
     
+    # Check if the session has been compiled with the same keywords before
+    # (see compilation_caching.py)
+    cache_key = compilation_cache.get_key(
+        qs,
+        workspace,
+        disable_uncomputation,
+        intended_measurements,
+        cancel_qfts,
+        compile_mcm,
+        gate_speed,
+        use_dirty_anc_for_mcx_recomp,
+    )
+    
+    if cache_key is not None:
+        cached_qc = compilation_cache.lookup(cache_key, qs)
+        if cached_qc is not None:
+            return cached_qc
+    
     if gate_speed is None:
         gate_speed = lambda x : 1
     
@@ -457,9 +476,14 @@ def qompiler(
         reduced_qc = cancel_inverses(reduced_qc)
 
     if reduced_qc.depth(depth_indicator = gate_speed) > qc.depth(depth_indicator = gate_speed):
-        return qc
+        res = qc
     else:
-        return reduced_qc
+        res = reduced_qc
+    
+    if cache_key is not None:
+        res = compilation_cache.store(cache_key, qs, res)
+    
+    return res
 
 
 def gen_hybrid_mcx_data(controls, 
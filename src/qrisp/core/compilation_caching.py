@@ -0,0 +1,476 @@
+"""
+\********************************************************************************
+* Copyright (c) 2023 the Qrisp authors
+*
+* This program and the accompanying materials are made available under the
+* terms of the Eclipse Public License 2.0 which is available at
+* http://www.eclipse.org/legal/epl-2.0.
+*
+* This Source Code may also be made available under the following Secondary
+* Licenses when the conditions for such availability set forth in the Eclipse
+* Public License, v. 2.0 are satisfied: GNU General Public License, version 2
+* with the GNU Classpath Exception which is
+* available at https://www.gnu.org/software/classpath/license.html.
+*
+* SPDX-License-Identifier: EPL-2.0 OR GPL-2.0 WITH Classpath-exception-2.0
+********************************************************************************/
+"""
+
+import os
+import pickle
+import weakref
+from collections import OrderedDict
+from hashlib import blake2b
+
+import numpy as np
+from sympy.core.expr import Expr
+
+from qrisp.circuit import QuantumCircuit, Operation, Instruction, Qubit
+
+
+# Compiling a QuantumSession (see the qompiler function) is expensive, but the result
+# only depends on the structure of the session data and the compilation keywords.
+# This module implements a cache for the compiled circuits.
+
+# The key of the cache is a fingerprint of the session, which describes every
+# instruction by the fingerprint of its operation and the indices of its qubits/clbits.
+# The fingerprints are computed with hashlib (instead of Python's hash function) such
+# that they are stable across processes, which allows to store the compiled circuits
+# on the disk.
+
+# Note that the compiled circuit contains qubits that imitate the qubits of the session
+# (ie. they have the same identifier and hash value). When retrieving a circuit from
+# the cache, we therefore create new qubits that imitate the qubits of the session
+# that requested the compilation.
+
+
+# Attributes of Operation objects that are derived from the other attributes and
+# therefore don't need to be part of the fingerprint
+derived_attributes = {"unitary", "unitary_array", "lambdified_params", "definition"}
+
+plain_types = {type(None), bool, int, float, complex, str}
+
+
+# Fingerprinting the definition of composite operations is the most expensive part
+# of the key computation. Since Operation objects are usually not modified after
+# their creation, we keep the fingerprints of composite operations across calls.
+# Note that Operation.__hash__ depends on the name and the parameters, so modifying
+# these attributes invalidates the entry.
+composite_fingerprints = weakref.WeakKeyDictionary()
+
+
+def op_fingerprint(op, memo):
+    try:
+        return memo[id(op)]
+    except KeyError:
+        pass
+
+    if op.definition is not None:
+        try:
+            res = composite_fingerprints[op]
+            memo[id(op)] = res
+            return res
+        except (KeyError, TypeError):
+            pass
+
+    h = blake2b(digest_size=16)
+
+    # Attributes with plain values are collected and represented as a single string
+    plain_attributes = [type(op).__name__]
+
+    op_dict = vars(op)
+    for name in sorted(op_dict.keys()):
+        if name in derived_attributes:
+            continue
+        value = op_dict[name]
+        if type(value) in plain_types or (
+            type(value) in (list, tuple) and {type(x) for x in value} <= plain_types
+        ):
+            plain_attributes.append(name)
+            plain_attributes.append(value)
+        elif type(value) in (set, dict) and not value:
+            plain_attributes.append(name)
+            plain_attributes.append(type(value).__name__)
+        elif type(value) is dict and {type(x) for x in value.keys()} | {
+            type(x) for x in value.values()
+        } <= plain_types:
+            plain_attributes.append(name)
+            plain_attributes.append(sorted(value.items(), key=repr))
+        else:
+            h.update(name.encode("utf-8"))
+            h.update(attribute_fingerprint(value, memo))
+
+    h.update(repr(plain_attributes).encode("utf-8"))
+
+    if op.definition is not None:
+        h.update(circuit_fingerprint(op.definition, memo))
+
+    res = h.digest()
+    memo[id(op)] = res
+
+    if op.definition is not None:
+        try:
+            composite_fingerprints[op] = res
+        except TypeError:
+            pass
+
+    return res
+
+
+# Returns the fingerprint of an attribute value of an Operation. If the value can't be
+# fingerprinted reliably, a TypeError is raised (and the compilation is not cached).
+def attribute_fingerprint(value, memo):
+    value_type = type(value)
+    if value_type in plain_types:
+        return repr(value).encode("utf-8")
+    elif isinstance(value, np.number):
+        return repr(value.item()).encode("utf-8")
+    elif isinstance(value, Expr):
+        return str(value).encode("utf-8")
+    elif isinstance(value, Operation):
+        return op_fingerprint(value, memo)
+    elif isinstance(value, QuantumCircuit):
+        return circuit_fingerprint(value, memo)
+    elif isinstance(value, (list, tuple)):
+        return b"[" + b",".join(attribute_fingerprint(x, memo) for x in value) + b"]"
+    elif isinstance(value, (set, frozenset)):
+        return b"{" + b",".join(sorted(attribute_fingerprint(x, memo) for x in value)) + b"}"
+    elif isinstance(value, dict):
+        items = [
+            attribute_fingerprint(k, memo) + b":" + attribute_fingerprint(v, memo)
+            for k, v in value.items()
+        ]
+        return b"{" + b",".join(sorted(items)) + b"}"
+    elif isinstance(value, np.ndarray):
+        return (
+            str(value.dtype).encode("utf-8")
+            + repr(value.shape).encode("utf-8")
+            + blake2b(value.tobytes(), digest_size=16).digest()
+        )
+    elif hasattr(value, "__code__") and not value.__closure__:
+        return code_fingerprint(value.__code__)
+    else:
+        raise TypeError(f"Can't fingerprint object of type {value_type}")
+
+
+def code_fingerprint(code):
+    return blake2b(
+        code.co_code + repr((code.co_consts, code.co_names)).encode("utf-8"),
+        digest_size=16,
+    ).digest()
+
+
+# Computes the fingerprint of a QuantumCircuit in a single pass over the data.
+# The memo dictionary stores the fingerprints of the operations that have already
+# been treated (Operation objects are usually shared by many instructions).
+def circuit_fingerprint(qc, memo=None):
+    if memo is None:
+        memo = {}
+
+    qubit_indices = {qc.qubits[i]: i for i in range(len(qc.qubits))}
+    clbit_indices = {qc.clbits[i]: i for i in range(len(qc.clbits))}
+
+    h = blake2b(digest_size=16)
+    h.update(f"{len(qc.qubits)},{len(qc.clbits)}".encode("utf-8"))
+
+    # Consecutive allocations commute but their order is not always deterministic
+    # (for instance when allocating via session merging). We therefore collect the
+    # indices of consecutive allocated qubits and hash them in sorted order.
+    allocated_qubits = []
+
+    for instr in qc.data:
+        if instr.op.name == "qb_alloc":
+            allocated_qubits.append(qubit_indices[instr.qubits[0]])
+            continue
+        elif allocated_qubits:
+            h.update(b"qb_alloc")
+            h.update(np.array(sorted(allocated_qubits), dtype=np.int64).tobytes())
+            allocated_qubits = []
+
+        h.update(op_fingerprint(instr.op, memo))
+        h.update(
+            np.array(
+                [qubit_indices[qb] for qb in instr.qubits]
+                + [-1]
+                + [clbit_indices[cb] for cb in instr.clbits],
+                dtype=np.int64,
+            ).tobytes()
+        )
+
+    if allocated_qubits:
+        h.update(b"qb_alloc")
+        h.update(np.array(sorted(allocated_qubits), dtype=np.int64).tobytes())
+
+    return h.digest()
+
+
+class CompilationCache:
+    """
+    This class implements a least-recently-used cache for compiled QuantumSessions.
+    The cache used by :meth:`QuantumSession.compile <qrisp.QuantumSession.compile>`
+    (and therefore :meth:`get_measurement <qrisp.QuantumVariable.get_measurement>`)
+    is available as ``qrisp.compilation_cache``.
+
+    The memory consumption is bounded by the amount of entries and the total amount
+    of instructions of the cached circuits. Optionally, compiled circuits can also be
+    stored in a directory such that they are shared between processes.
+
+    Parameters
+    ----------
+    max_entries : int, optional
+        The maximum amount of cached compilations. The default is 64.
+    max_instructions : int, optional
+        The maximum total amount of instructions of the cached circuits.
+        The default is 10**6.
+    disk_path : str, optional
+        A directory to store compiled circuits in. By default, the environment variable
+        ``QRISP_COMPILATION_CACHE`` is used. If it is not set, nothing is stored on the
+        disk.
+
+    Examples
+    --------
+
+    >>> from qrisp import QuantumFloat, compilation_cache
+    >>> a = QuantumFloat(3)
+    >>> a[:] = 3
+    >>> b = a*a
+    >>> compilation_cache.clear()
+    >>> qc = b.qs.compile()
+    >>> qc = b.qs.compile()
+    >>> compilation_cache.statistics()
+    {'hits': 1, 'disk_hits': 0, 'misses': 1, 'entries': 1, 'instructions': 120}
+
+    """
+
+    def __init__(self, max_entries=64, max_instructions=10**6, disk_path=None):
+        self.max_entries = max_entries
+        self.max_instructions = max_instructions
+
+        if disk_path is None:
+            disk_path = os.environ.get("QRISP_COMPILATION_CACHE", None)
+        self.disk_path = disk_path
+
+        self.enabled = True
+        self.entries = OrderedDict()
+        self.clear()
+
+    def clear(self):
+        """
+        Removes all entries from the (in-memory) cache and resets the statistics.
+        """
+        self.entries.clear()
+        self.instruction_count = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def statistics(self):
+        """
+        Returns a dictionary containing the amount of cache hits (in memory and on the
+        disk), misses, entries and cached instructions.
+        """
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "entries": len(self.entries),
+            "instructions": self.instruction_count,
+        }
+
+    # Returns the key of a compilation of qs with the given keyword arguments.
+    # If the compilation can't be cached, None is returned.
+    def get_key(
+        self,
+        qs,
+        workspace,
+        disable_uncomputation,
+        intended_measurements,
+        cancel_qfts,
+        compile_mcm,
+        gate_speed,
+        use_dirty_anc_for_mcx_recomp,
+    ):
+        # The automatic uncomputation depends on the state of the QuantumVariables
+        if not self.enabled or not disable_uncomputation:
+            return None
+
+        # The gate_speed function is identified by its bytecode. Functions with
+        # closures (or other callables) are not cached.
+        if gate_speed is not None:
+            if not hasattr(gate_speed, "__code__") or gate_speed.__closure__:
+                return None
+            gate_speed = code_fingerprint(gate_speed.__code__)
+
+        qubit_indices = {qs.qubits[i]: i for i in range(len(qs.qubits))}
+
+        try:
+            intended_measurements = [qubit_indices[qb] for qb in intended_measurements]
+
+            # The order of the qubits of the compiled circuit depends on the
+            # QuantumVariables
+            qv_indices = [
+                [qubit_indices.get(qb, -1) for qb in qv.reg]
+                for qv in getattr(qs, "qv_list", [])
+            ]
+
+            h = blake2b(digest_size=20)
+            h.update(circuit_fingerprint(qs))
+        except (KeyError, AttributeError, TypeError):
+            return None
+
+        h.update(
+            repr(
+                (
+                    workspace,
+                    intended_measurements,
+                    qv_indices,
+                    cancel_qfts,
+                    compile_mcm,
+                    gate_speed,
+                    use_dirty_anc_for_mcx_recomp,
+                )
+            ).encode("utf-8")
+        )
+
+        return h.hexdigest()
+
+    # Returns the cached compilation for the given key, translated to the qubits and
+    # clbits of qs. If there is no such compilation, None is returned.
+    def lookup(self, key, qs):
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return translate_compiled_qc(self.entries[key], qs)
+
+        if self.disk_path is not None:
+            try:
+                with open(os.path.join(self.disk_path, key + ".pkl"), "rb") as f:
+                    entry = pickle.load(f)
+            except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+                entry = None
+
+            if entry is not None:
+                self.disk_hits += 1
+                self.insert(key, entry)
+                return translate_compiled_qc(entry, qs)
+
+        self.misses += 1
+        return None
+
+    # Stores the compiled circuit of qs and returns a translated copy (such that
+    # modifications of the result don't modify the cache entry)
+    def store(self, key, qs, compiled_qc):
+        qubit_indices = {qs.qubits[i]: i for i in range(len(qs.qubits))}
+
+        # For each qubit of the compiled circuit, we log the index of the session
+        # qubit it imitates (or -1 for workspace qubits)
+        qubit_sources = [qubit_indices.get(qb, -1) for qb in compiled_qc.qubits]
+
+        entry = (compiled_qc, qubit_sources, len(qs.clbits))
+
+        self.insert(key, entry)
+
+        if self.disk_path is not None:
+            try:
+                os.makedirs(self.disk_path, exist_ok=True)
+                file_path = os.path.join(self.disk_path, key + ".pkl")
+                temp_path = file_path + "." + str(os.getpid())
+                with open(temp_path, "wb") as f:
+                    pickle.dump(entry, f)
+                os.replace(temp_path, file_path)
+            except Exception:
+                # Circuits containing unpicklable objects are only cached in memory
+                pass
+
+        return translate_compiled_qc(entry, qs)
+
+    def insert(self, key, entry):
+        if key in self.entries:
+            return
+
+        instruction_amount = len(entry[0].data)
+
+        if instruction_amount > self.max_instructions:
+            return
+
+        self.entries[key] = entry
+        self.instruction_count += instruction_amount
+
+        while (
+            len(self.entries) > self.max_entries
+            or self.instruction_count > self.max_instructions
+        ):
+            _, removed_entry = self.entries.popitem(last=False)
+            self.instruction_count -= len(removed_entry[0].data)
+
+
+# Creates a copy of the cached compiled circuit, where the qubits imitating the qubits of
+# the compiled session are replaced by qubits imitating the qubits of qs.
+def translate_compiled_qc(entry, qs):
+    compiled_qc, qubit_sources, clbit_amount = entry
+
+    # The qompiler sorts the qubits which don't belong to a QuantumVariable by their
+    # identifier. Since the identifiers of these qubits usually contain a counter
+    # (like "reduced_12"), we don't include them into the key but redo the sorting
+    # with the identifiers of the requesting session.
+    qv_qubit_indices = set()
+    for qv in getattr(qs, "qv_list", []):
+        for qb in qv.reg:
+            qv_qubit_indices.add(qb)
+    qv_qubit_indices = {
+        i for i in range(len(qs.qubits)) if qs.qubits[i] in qv_qubit_indices
+    }
+
+    temp_positions = [
+        i
+        for i in range(len(qubit_sources))
+        if qubit_sources[i] != -1 and qubit_sources[i] not in qv_qubit_indices
+    ]
+    sorted_temp_positions = sorted(
+        temp_positions, key=lambda i: qs.qubits[qubit_sources[i]].identifier
+    )
+    qubit_order = list(range(len(qubit_sources)))
+    for i, j in zip(temp_positions, sorted_temp_positions):
+        qubit_order[i] = j
+
+    translation_dic = {}
+    new_qubits = [None] * len(qubit_sources)
+    for i in range(len(qubit_sources)):
+        qb = compiled_qc.qubits[i]
+        source = qubit_sources[i]
+        if source == -1:
+            new_qb = Qubit(qb.identifier)
+        else:
+            session_qb = qs.qubits[source]
+            new_qb = Qubit(session_qb.identifier)
+            new_qb.hash_value = session_qb.hash_value
+        translation_dic[qb] = new_qb
+        new_qubits[i] = new_qb
+
+    new_qubits = [new_qubits[i] for i in qubit_order]
+
+    new_clbits = list(qs.clbits[:clbit_amount]) + list(compiled_qc.clbits[clbit_amount:])
+    cl_translation_dic = dict(zip(compiled_qc.clbits, new_clbits))
+
+    res = QuantumCircuit()
+    object.__setattr__(res, "qubits", new_qubits)
+    object.__setattr__(res, "clbits", new_clbits)
+    object.__setattr__(
+        res,
+        "data",
+        [
+            Instruction(
+                instr.op,
+                [translation_dic[qb] for qb in instr.qubits],
+                [cl_translation_dic[cb] for cb in instr.clbits],
+            )
+            for instr in compiled_qc.data
+        ],
+    )
+
+    res.abstract_params = set(compiled_qc.abstract_params)
+
+    return res
+
+
+compilation_cache = CompilationCache()
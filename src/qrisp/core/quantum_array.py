@@ -21,7 +21,7 @@ from itertools import product
 
 import numpy as np
 
-from qrisp.circuit import transpile
+from qrisp.circuit import transpile, ParametricTemplate
 from qrisp.core import QuantumVariable, qompiler
 from qrisp.misc import bin_rep
 
@@ -463,6 +463,9 @@ class QuantumArray(np.ndarray):
         circuit_preprocessor : Python function, optional
             A function which recieves a QuantumCircuit and returns one, which is applied
             after compilation and parameter substitution. The default is None.
+        precompiled_qc : QuantumCircuit or ParametricTemplate, optional
+            A precompiled circuit, which is measured instead of compiling the
+            QuantumSession. The default is None.
 
         Raises
         ------
@@ -511,33 +514,38 @@ class QuantumArray(np.ndarray):
         # Copy circuit in over to prevent modification
         # from qrisp.quantum_network import QuantumNetworkClient
 
-        if precompiled_qc is None:
-            if compile:
-                qc = qompiler(
-                    self.qs, intended_measurements=qubits, **compilation_kwargs
-                )
-            else:
-                qc = self.qs.copy()
+        from qrisp.misc import get_measurement_from_qc
 
-            # Transpile circuit
-            qc = transpile(qc)
+        if isinstance(precompiled_qc, ParametricTemplate):
+            counts = precompiled_qc.get_measurement(
+                subs_dic, qubits, backend, shots, circuit_preprocessor
+            )
         else:
-            qc = precompiled_qc.copy()
+            if precompiled_qc is None:
+                if compile:
+                    qc = qompiler(
+                        self.qs, intended_measurements=qubits, **compilation_kwargs
+                    )
+                else:
+                    qc = self.qs.copy()
 
-        # Bind parameters
-        if subs_dic:
-            qc = qc.bind_parameters(subs_dic)
-            from qrisp.core.compilation import combine_single_qubit_gates
+                # Transpile circuit
+                qc = transpile(qc)
+            else:
+                qc = precompiled_qc.copy()
 
-            qc = combine_single_qubit_gates(qc)
+            # Bind parameters
+            if subs_dic:
+                qc = qc.bind_parameters(subs_dic)
+                from qrisp.core.compilation import combine_single_qubit_gates
 
-        # Execute user specified circuit_preprocessor
-        if circuit_preprocessor is not None:
-            qc = circuit_preprocessor(qc)
+                qc = combine_single_qubit_gates(qc)
 
-        from qrisp.misc import get_measurement_from_qc
+            # Execute user specified circuit_preprocessor
+            if circuit_preprocessor is not None:
+                qc = circuit_preprocessor(qc)
 
-        counts = get_measurement_from_qc(qc, qubits, backend, shots)
+            counts = get_measurement_from_qc(qc, qubits, backend, shots)
 
         # Insert outcome labels (if available and hashable)
         new_counts_dic = {}
@@ -24,6 +24,7 @@ import matplotlib.pyplot as plt
 import numpy as np
 
 from qrisp.core.compilation import qompiler
+from qrisp.circuit import ParametricTemplate
 
 
 class QuantumVariable:
@@ -873,6 +874,7 @@ class QuantumVariable:
         circuit_preprocessor=None,
         filename=None,
         precompiled_qc=None,
+        return_arrays=False,
     ):
         r"""
         Method for quick access to the measurement results of the state of the variable.
@@ -905,6 +907,17 @@ class QuantumVariable:
             after compilation and parameter substitution. The default is None.
         filename : string, optional
             The location of where to save a generated plot. The default is None.
+        precompiled_qc : QuantumCircuit or ParametricTemplate, optional
+            A precompiled circuit, which is measured instead of compiling the
+            QuantumSession. For :ref:`ParametricTemplate` objects, the parameters
+            specified in ``subs_dic`` are bound without sympy substitution.
+            The default is None.
+        return_arrays : bool, optional
+            If set to True, the results are returned as a tuple of NumPy arrays
+            ``(outcomes, probabilities)``, where the outcomes are the (undecoded)
+            integer labels. This skips the construction of the result dictionary,
+            which is useful for evaluating expectation values of many outcomes. The
+            default is False.
 
         Raises
         ------
@@ -916,6 +929,8 @@ class QuantumVariable:
         -------
         dict
             A dictionary of values and their corresponding measurement probabilities.
+            If ``return_arrays`` is True, a tuple of NumPy arrays containing the
+            integer labels and the probabilities.
 
         Examples
         --------
@@ -948,41 +963,58 @@ class QuantumVariable:
             raise Exception("Tried to get measurement from deleted QuantumVariable")
 
         if self.size == 0:
+            if return_arrays:
+                return np.zeros(1, dtype=np.int64), np.ones(1)
             return {"": 1.0}
 
-        if precompiled_qc is None:
-            if compile:
-                qc = qompiler(
-                    self.qs, intended_measurements=self.reg, **compilation_kwargs
-                )
-            else:
-                qc = self.qs.copy()
+        from qrisp.misc import get_measurement_from_qc
+
+        if isinstance(precompiled_qc, ParametricTemplate):
+            counts = precompiled_qc.get_measurement(
+                subs_dic,
+                self.reg,
+                backend,
+                shots,
+                circuit_preprocessor,
+                return_arrays=return_arrays,
+            )
         else:
-            qc = precompiled_qc.copy()
+            if precompiled_qc is None:
+                if compile:
+                    qc = qompiler(
+                        self.qs, intended_measurements=self.reg, **compilation_kwargs
+                    )
+                else:
+                    qc = self.qs.copy()
+            else:
+                qc = precompiled_qc.copy()
 
-        # Bind parameters
-        if subs_dic:
-            qc = qc.bind_parameters(subs_dic)
-            from qrisp.core.compilation import combine_single_qubit_gates
+            # Bind parameters
+            if subs_dic:
+                qc = qc.bind_parameters(subs_dic)
+                from qrisp.core.compilation import combine_single_qubit_gates
 
-            qc = combine_single_qubit_gates(qc)
+                qc = combine_single_qubit_gates(qc)
 
-        # Copy circuit in over to prevent modification
-        # from qrisp.quantum_network import QuantumNetworkClient
+            # Copy circuit in over to prevent modification
+            # from qrisp.quantum_network import QuantumNetworkClient
 
-        # if isinstance(backend, QuantumNetworkClient):
-        #     self.qs.data = []
-        #     shots = 1
+            # if isinstance(backend, QuantumNetworkClient):
+            #     self.qs.data = []
+            #     shots = 1
 
-        # Execute user specified circuit_preprocessor
-        if circuit_preprocessor is not None:
-            qc = circuit_preprocessor(qc)
+            # Execute user specified circuit_preprocessor
+            if circuit_preprocessor is not None:
+                qc = circuit_preprocessor(qc)
 
-        qc = qc.transpile()
+            qc = qc.transpile()
 
-        from qrisp.misc import get_measurement_from_qc
+            counts = get_measurement_from_qc(
+                qc, self.reg, backend, shots, return_arrays
+            )
 
-        counts = get_measurement_from_qc(qc, self.reg, backend, shots)
+        if return_arrays:
+            return counts
 
         # Insert outcome labels (if available and hashable)
         try:
@@ -18,13 +18,24 @@
 
 
 from qrisp.interface import VirtualBackend, QiskitBackend
-from qrisp.simulator.simulator import run
+from qrisp.simulator.simulator import run, run_batch
 from qrisp import QuantumCircuit
 
 
 class DefaultBackend:
     def run(self, qc, shots=None, token=""):
         return run(qc, shots, token)
+    
+    # Executes a circuit and returns the outcomes as a tuple of NumPy arrays
+    # (outcomes, probabilities) instead of a dictionary of bit strings
+    # (compare qrisp.simulator.run)
+    def run_arrays(self, qc, shots=None):
+        return run(qc, shots, return_arrays=True)
+    
+    # Executes a parametrized circuit for a batch of parameter values
+    # (compare qrisp.simulator.run_batch)
+    def run_batch(self, qc, parameters, shots=None, processes=None):
+        return run_batch(qc, parameters, shots, processes=processes)
 
 
 def_backend = DefaultBackend()
@@ -1257,7 +1257,25 @@ def check_if_fresh(qubits, qs, ignore_q_envs=True):
     return True
 
 
-def get_measurement_from_qc(qc, qubits, backend, shots=None):
+# If return_arrays is True, the result is a tuple of NumPy arrays (outcomes,
+# probabilities) instead of a dictionary (compare process_arrays).
+def get_measurement_from_qc(qc, qubits, backend, shots=None, return_arrays=False):
+    
+    # Backends that can return the results as arrays (like the default backend) skip
+    # the formatting and parsing of the outcome strings. If the circuit contains
+    # other measurements, the outcomes are processed as strings.
+    if return_arrays and hasattr(backend, "run_arrays"):
+        for instr in qc.data:
+            if instr.op.name == "measure":
+                break
+        else:
+            for i in range(len(qubits)):
+                qc.measure(qubits[i], qc.add_clbit())
+            
+            outcome_array, probability_array = backend.run_arrays(qc, shots)
+            
+            return process_arrays(outcome_array, probability_array)
+    
     # Add classical registers for the measurement results to be stored in
     cl = []
     for i in range(len(qubits)):
@@ -1269,7 +1287,19 @@ def get_measurement_from_qc(qc, qubits, backend, shots=None):
 
     # Execute circuit
     counts = backend.run(qc, shots)
+    
+    counts = process_counts(counts, len(cl))
+    
+    if return_arrays:
+        return np.array(list(counts.keys())), np.array(list(counts.values()))
+
+    return counts
+
 
+# Processes the counts dictionary returned by a backend, where the first clbit_amount
+# bits of the outcome strings belong to the measurement of interest. The resulting
+# dictionary has integers as keys and the normalized counts as values.
+def process_counts(counts, clbit_amount):
     # Remove other measurements outcomes from counts dic
     new_counts_dic = {}
 
@@ -1279,7 +1309,7 @@ def get_measurement_from_qc(qc, qubits, backend, shots=None):
         # Remove possible whitespaces
         new_key = key.replace(" ", "")
         # Remove other measurements
-        new_key = new_key[: len(cl)]
+        new_key = new_key[:clbit_amount]
 
         new_key = int(new_key, base=2)
         try:
@@ -1300,6 +1330,19 @@ def get_measurement_from_qc(qc, qubits, backend, shots=None):
     return counts
 
 
+# Array counterpart of process_counts. Receives the outcomes (integers) and the
+# probabilities (or counts) of a backend and returns normalized probabilities. If shift
+# is given, the least significant shift bits of the outcomes belong to other
+# measurements and are traced out.
+def process_arrays(outcome_array, probability_array, shift=0):
+    
+    if shift:
+        outcome_array, inverse = np.unique(outcome_array >> shift, return_inverse=True)
+        probability_array = np.bincount(inverse, weights=probability_array)
+    
+    return outcome_array, probability_array / np.sum(probability_array)
+
+
 def find_calling_line(level=0):
     stack = traceback.extract_stack(limit=level + 3)
     return str(
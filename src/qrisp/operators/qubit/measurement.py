@@ -21,6 +21,7 @@ import math
 import numpy as np
 from numba import njit
 
+from qrisp.circuit import ParametricTemplate
 from qrisp.core import QuantumVariable, QuantumArray
 from qrisp.core.compilation import qompiler
 
@@ -61,7 +62,7 @@ def get_measurement(
         A dictionary of Sympy symbols and floats to specify parameters in the case
         of a circuit with unspecified, :ref:`abstract parameters<QuantumCircuit>`.
         The default is ``{}``.
-    precompiled_qc : QuantumCircuit, optional
+    precompiled_qc : QuantumCircuit or ParametricTemplate, optional
             A precompiled quantum circuit.
     diagonalisation_method : str, optional
         Specifies the method for grouping and diagonalizing the QubitOperator. 
@@ -119,6 +120,13 @@ def get_measurement(
         raise Exception("Tried to get measurement within open environment")
 
 
+    if measurement_data is None:
+        measurement_data = QubitOperatorMeasurement(hamiltonian, diagonalisation_method = diagonalisation_method)
+    
+    # Parametric templates bind the parameters themselves
+    if isinstance(precompiled_qc, ParametricTemplate):
+        return measurement_data.get_measurement(precompiled_qc, qarg, precision, backend, subs_dic = subs_dic)
+
     # Copy circuit in over to prevent modification
     if precompiled_qc is None:        
         if compile:
@@ -138,9 +146,6 @@ def get_measurement(
 
     qc = qc.transpile()
     
-    if measurement_data is None:
-        measurement_data = QubitOperatorMeasurement(hamiltonian, diagonalisation_method = diagonalisation_method)
-    
     return measurement_data.get_measurement(qc, qarg, precision, backend)
     
 
@@ -175,7 +180,9 @@ class QubitOperatorMeasurement:
         N = sum(self.stds)
         self.shots_list = [N*s for s in self.stds]
     
-    def get_measurement(self, qc, qubit_list, precision, backend):
+    # If qc is a ParametricTemplate, the parameters are bound to the values given in
+    # subs_dic
+    def get_measurement(self, qc, qubit_list, precision, backend, subs_dic={}):
         
         from qrisp.misc import get_measurement_from_qc
         results = []
@@ -188,12 +195,16 @@ class QubitOperatorMeasurement:
             
             shots = int(self.shots_list[i]/precision**2)
             
-            qubits = [qubit_list[j] for j in range(self.change_of_basis_gates[i].num_qubits)]
-            
-            curr = qc.copy()
-            curr.append(self.change_of_basis_gates[i], qubits)
-            
-            res = get_measurement_from_qc(curr, list(qubit_list), backend, shots)
+            if isinstance(qc, ParametricTemplate):
+                res = qc.get_measurement(subs_dic, list(qubit_list), backend, shots, 
+                                         basis_change = self.change_of_basis_gates[i])
+            else:
+                qubits = [qubit_list[j] for j in range(self.change_of_basis_gates[i].num_qubits)]
+                
+                curr = qc.copy()
+                curr.append(self.change_of_basis_gates[i], qubits)
+                
+                res = get_measurement_from_qc(curr, list(qubit_list), backend, shots)
             results.append(res)
             
             temp_meas_ops = []
@@ -22,6 +22,7 @@ from qrisp.simulator.bi_arrays import (
     DummyBiArray,
     SparseBiArray,
     tensordot,
+    set_simulator_threads,
 )
 from qrisp.simulator.circuit_reordering import *
 from qrisp.simulator.quantum_state import QuantumState, TensorFactor
@@ -16,9 +16,11 @@
 ********************************************************************************/
 """
 
-import threading
+import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 
+import numba
 import numpy as np
 from scipy.sparse import (
     coo_array,
@@ -89,10 +91,10 @@ class BiArray:
 # reshaping and axis swappings are "collected" and executed together once the array is
 # required for contraction.
 
-# Both classes automatically make use of potential parallelism in the code.
-# This is achieved by returning arrays where the content is "under construction" by a
-# certain thread. If the "under construction" array is required in a contraction, the
-# finishing of the calculation process is awaited.
+# Both classes automatically make use of multiple cores for large arrays. This is
+# achieved by splitting the expensive numpy operations (matrix multiplication, axis
+# permutation and tensor products) into chunks, which are processed by a shared pool
+# of worker threads (numpy releases the GIL for these operations).
 
 # The tensordot function is a numpy-esque interface for performing tensor contractions.
 # This function also automatically converts between sparse and dense BiArrays once a
@@ -104,7 +106,181 @@ class BiArray:
 # quickly evaluate the performance of a contraction order without actually contracting.
 
 
-multithreading_threshold = np.inf
+# The amount of worker threads can be configured using the set_simulator_threads
+# function or the environment variable QRISP_SIMULATOR_THREADS. By default, all
+# available cores are used.
+simulator_threads = int(os.environ.get("QRISP_SIMULATOR_THREADS", os.cpu_count() or 1))
+thread_pool = None
+
+# Arrays with less entries than this threshold are processed by the calling thread,
+# since distributing small tasks costs more than it gains. The threshold is
+# calibrated by a micro benchmark once it is required for the first time.
+multithreading_threshold = None
+
+
+def set_simulator_threads(thread_amount):
+    """
+    Sets the amount of threads that are used by the simulator to perform large
+    tensor contractions.
+
+    Parameters
+    ----------
+    thread_amount : int
+        The amount of threads.
+
+    """
+    global simulator_threads, thread_pool, multithreading_threshold
+
+    if thread_pool is not None:
+        thread_pool.shutdown()
+        thread_pool = None
+
+    simulator_threads = max(1, int(thread_amount))
+    multithreading_threshold = None
+
+    # The jitted sparse matrix kernels use the numba thread pool
+    numba.set_num_threads(min(simulator_threads, numba.config.NUMBA_NUM_THREADS))
+
+
+def get_thread_pool():
+    global thread_pool
+    if thread_pool is None:
+        thread_pool = ThreadPoolExecutor(max_workers=simulator_threads)
+    return thread_pool
+
+
+def get_multithreading_threshold():
+    global multithreading_threshold
+    if multithreading_threshold is None:
+        multithreading_threshold = calibrate_multithreading_threshold()
+    return multithreading_threshold
+
+
+# Determines the array size, where the computation time of a (typical) gate application
+# is ten times the overhead of distributing the computation among the workers.
+def calibrate_multithreading_threshold():
+    if simulator_threads == 1:
+        return np.inf
+
+    pool = get_thread_pool()
+
+    overhead = np.inf
+    for i in range(5):
+        start_time = time.perf_counter()
+        for future in [pool.submit(int) for j in range(simulator_threads)]:
+            future.result()
+        overhead = min(overhead, time.perf_counter() - start_time)
+
+    matrix = np.ones((4, 4), dtype=np.complex64)
+    state = np.ones((4, 2**14), dtype=np.complex64)
+
+    duration = np.inf
+    for i in range(5):
+        start_time = time.perf_counter()
+        np.matmul(matrix, state)
+        duration = min(duration, time.perf_counter() - start_time)
+
+    duration_per_entry = max(duration, 1e-9) / state.size
+
+    return max(2**12, 2 ** int(np.ceil(np.log2(10 * overhead / duration_per_entry))))
+
+
+# Returns True if an operation creating an array of the given size and dtype should
+# be distributed among the threads
+def use_multithreading(size, dtype):
+    return (
+        simulator_threads > 1
+        and dtype != np.dtype("O")
+        and size >= get_multithreading_threshold()
+    )
+
+
+# Splits the given axis of the given shape into one interval per thread and executes
+# function(slice_tuple) for each of them using the thread pool
+def run_chunked(function, shape, axis):
+    chunk_amount = min(simulator_threads, shape[axis])
+    boundaries = np.linspace(0, shape[axis], chunk_amount + 1).astype(np.int64)
+
+    futures = []
+    for i in range(chunk_amount):
+        slice_tuple = (slice(None),) * axis + (
+            slice(boundaries[i], boundaries[i + 1]),
+        )
+        futures.append(get_thread_pool().submit(function, slice_tuple))
+
+    for future in futures:
+        future.result()
+
+
+# Matrix multiplication, which splits the larger dimension of the result among the
+# threads
+def parallel_matmul(a, b):
+    dtype = np.result_type(a.dtype, b.dtype)
+    if not use_multithreading(a.shape[0] * b.shape[1], dtype):
+        return np.matmul(a, b)
+
+    res = np.empty((a.shape[0], b.shape[1]), dtype=dtype)
+
+    if a.shape[0] >= b.shape[1]:
+
+        def chunk_matmul(slice_tuple):
+            np.matmul(a[slice_tuple], b, out=res[slice_tuple])
+
+        run_chunked(chunk_matmul, res.shape, 0)
+    else:
+
+        def chunk_matmul(slice_tuple):
+            res[slice_tuple] = np.matmul(a, b[slice_tuple])
+
+        run_chunked(chunk_matmul, res.shape, 1)
+
+    return res
+
+
+# Returns a contiguous copy of the given (axis permuted) array view
+def parallel_copy(array):
+    if not use_multithreading(array.size, array.dtype):
+        return np.ascontiguousarray(array)
+
+    # Find the first axis that can be split among the threads
+    for axis in range(array.ndim):
+        if array.shape[axis] >= simulator_threads:
+            break
+    else:
+        return np.ascontiguousarray(array)
+
+    res = np.empty(array.shape, dtype=array.dtype)
+
+    def chunk_copy(slice_tuple):
+        np.copyto(res[slice_tuple], array[slice_tuple])
+
+    run_chunked(chunk_copy, res.shape, axis)
+
+    return res
+
+
+# Tensor product of two raveled arrays
+def parallel_outer(a, b):
+    dtype = np.result_type(a.dtype, b.dtype)
+    if not use_multithreading(a.size * b.size, dtype):
+        return np.multiply.outer(a, b)
+
+    res = np.empty((a.size, b.size), dtype=dtype)
+
+    if a.size >= b.size:
+
+        def chunk_outer(slice_tuple):
+            np.multiply.outer(a[slice_tuple], b, out=res[slice_tuple])
+
+        run_chunked(chunk_outer, res.shape, 0)
+    else:
+
+        def chunk_outer(slice_tuple):
+            np.multiply.outer(a, b[slice_tuple[1]], out=res[slice_tuple])
+
+        run_chunked(chunk_outer, res.shape, 1)
+
+    return res
 
 # This SparseBiArray class provides a numpy-esque rank n tensor interface, which uses
 # sparse matrix multiplication for tensor contraction. The fact that only powers of two
@@ -255,19 +431,6 @@ class SparseBiArray(BiArray):
             (self.nz_indices.copy(), self.data.copy()), shape=tuple(self.shape)
         )
 
-    # This method checks if the sparse array has a thread object, which means that
-    # it's data is under construction. If so, it waits until the thread is finished
-    def catch_up(self):
-        if hasattr(self, "thread"):
-            start_time = time.time()
-            self.thread.join()
-
-            duration = time.time() - start_time
-            if duration > 0.001:
-                # print(duration)
-                pass
-            del self.thread
-
     # Reshaping method - note that no data is manipulated, i.e. constant time
     def reshape(self, shape):
         if isinstance(shape, int):
@@ -373,9 +536,6 @@ class SparseBiArray(BiArray):
 
     # This method applies the index permutation generated too
     def apply_swaps(self):
-        # Wait for any contraction processes to finish
-        self.catch_up()
-
         # Check if any permutations have to be performed
         try:
             log_size = int(np.log2(self.size))
@@ -523,56 +683,43 @@ class SparseBiArray(BiArray):
             other.shape[len(axes_other) :]
         )
 
-        # In order to feature multiprocessing, we create an "empty" result array, which
-        # will be returned after the calculation has been started. If the content is
-        # needed before the calculation finished, the catch_up method will make sure the
-        # calculation finishes before further processing
         res = SparseBiArray(
             (np.zeros(1, dtype=np.int64), np.zeros(1, dtype=self.data.dtype)),
             shape=res_shape,
             contraction_counter=self.contraction_counter + other.contraction_counter,
         )
 
-        # Define multi processing wrapper
-        def mp_wrapper():
-            # Build up sparse matrices
-            sr_matrix_self = self.build_sr_matrix(
-                (contraction_size, self.size // contraction_size), transpose=True
-            )
-            sr_matrix_other = other.build_sr_matrix(
-                (contraction_size, other.size // contraction_size)
-            )
-
-            # Perform sparse matrix multiplication
+        # Build up sparse matrices
+        sr_matrix_self = self.build_sr_matrix(
+            (contraction_size, self.size // contraction_size), transpose=True
+        )
+        sr_matrix_other = other.build_sr_matrix(
+            (contraction_size, other.size // contraction_size)
+        )
 
-            res_sr_matrix = sparse_matrix_mult(sr_matrix_self, sr_matrix_other)
+        # Perform sparse matrix multiplication
 
-            # Acquire flattened coordinates from the helper function
-            res.nz_indices = hlp.gen_flat_coords(
-                res_sr_matrix.col, res_sr_matrix.row, res_sr_matrix.shape
-            )
+        res_sr_matrix = sparse_matrix_mult(sr_matrix_self, sr_matrix_other)
 
-            # Set the data
-            res.data = res_sr_matrix.data
+        # Acquire flattened coordinates from the helper function
+        res.nz_indices = hlp.gen_flat_coords(
+            res_sr_matrix.col, res_sr_matrix.row, res_sr_matrix.shape
+        )
 
-            # res.nz_indices, res.data = hlp.elim_zeros(res.nz_indices, res.data)
+        # Set the data
+        res.data = res_sr_matrix.data
 
-            # Set the sparsity
-            res.sparsity = len(res.nz_indices) / res.size
+        # res.nz_indices, res.data = hlp.elim_zeros(res.nz_indices, res.data)
 
-            # Perform consolidation operations
-            if False:
-                # if res.contraction_counter > self.contraction_counter_threshold:
-                res.sum_duplicates()
-                res.eliminate_zeros()
-                res.contraction_counter = 0
+        # Set the sparsity
+        res.sparsity = len(res.nz_indices) / res.size
 
-        # Start the thead
-        if res.size > multithreading_threshold:
-            res.thread = threading.Thread(target=mp_wrapper)
-            res.thread.start()
-        else:
-            mp_wrapper()
+        # Perform consolidation operations
+        if False:
+            # if res.contraction_counter > self.contraction_counter_threshold:
+            res.sum_duplicates()
+            res.eliminate_zeros()
+            res.contraction_counter = 0
 
         return res
 
@@ -708,21 +855,7 @@ class SparseBiArray(BiArray):
 
     # Return self as a DenseBiArray
     def to_dense(self):
-        res = DenseBiArray(np.zeros(1), sparsity=self.sparsity, shape=self.shape)
-
-        # We perform the same technique to enable multithreading as in contract,
-        # ie. return an unfinished result that is waited on if required
-        def mp_wrapper():
-            res.data = self.to_array()
-
-        # Start the thead
-        if self.size > multithreading_threshold:
-            res.thread = threading.Thread(target=mp_wrapper)
-            res.thread.start()
-        else:
-            mp_wrapper()
-
-        return res
+        return DenseBiArray(self.to_array(), sparsity=self.sparsity, shape=self.shape)
 
     def to_sparse(self):
         return self
@@ -731,7 +864,6 @@ class SparseBiArray(BiArray):
 # This class serves mainly as an interface to numpy arrays using the same methods as the
 # SparseBiArray class this way the algorithm using these classes doesn't need to care
 # about wether it's treating a sparse array or a dense array.
-# Furthermore, some multithreading techniques from the SparseBiArray class are deployed.
 class DenseBiArray(BiArray):
     # The constructor can only be called with numpy arrays
     def __init__(self, array, sparsity=None, shape=None):
@@ -771,18 +903,6 @@ class DenseBiArray(BiArray):
         self.apply_swaps()
         return DenseBiArray(self.data.copy(), sparsity=self.sparsity)
 
-    # Catch up method (same purpose as in SparseBiArray)
-    def catch_up(self):
-        if hasattr(self, "thread"):
-            start_time = time.time()
-            self.thread.join()
-
-            duration = time.time() - start_time
-            if duration > 0.001:
-                # print("Waited ", duration)
-                pass
-            del self.thread
-
     # The shape of the DenseBiArray is tracked only as a tuple.
     # Once the data is required for a contraction, the actual data will be reshaped
     def reshape(self, shape):
@@ -853,9 +973,6 @@ class DenseBiArray(BiArray):
 
     # This method works similarly as it's equivalent in SparseBiArray
     def apply_swaps(self):
-        # Wait for any computation processes to finish
-        self.catch_up()
-
         # Check if axes need to be swapped
         if self.index_bit_permutation == list(range(int(np.log2(self.size)))):
             # Check if data needs to be reshaped
@@ -928,8 +1045,10 @@ class DenseBiArray(BiArray):
             # Reshape data to the required shape
             self.data = self.data.reshape(perm_shape)
 
-            # Move the axes on the data
-            self.data = np.moveaxis(self.data, list(range(len(perm))), perm)
+            # Move the axes on the data (the copy makes the data contiguous)
+            self.data = parallel_copy(
+                np.moveaxis(self.data, list(range(len(perm))), perm)
+            )
 
             # Reshape the data
             self.data = self.data.reshape(self.shape)
@@ -1013,54 +1132,35 @@ class DenseBiArray(BiArray):
 
         res_sparsity = 1 - (1 - self.sparsity * other.sparsity) ** contraction_size
 
-        if self.dtype == np.dtype("O") or other.dtype == np.dtype("O"):
-            dtype = np.dtype("O")
-        else:
-            dtype = self.dtype
+        original_shape_self = self.shape
+        original_shape_other = other.shape
+
+        self.reshape([contraction_size, self.size // contraction_size])
+        other.reshape([contraction_size, other.size // contraction_size])
+
+        self.swapaxes(0, 1)
+
+        self.apply_swaps()
+        other.apply_swaps()
 
-        # Prepare "unfinished" result
         res = DenseBiArray(
-            np.array([self.data.ravel()[0] * other.data.ravel()[0]], dtype = dtype),
+            parallel_matmul(self.data, other.data).ravel(),
             sparsity=res_sparsity,
             shape=res_shape,
         )
 
-        # Prepare multithreading wrapper
-        # Performs the same logic as it's SparseBiArray equivalent
-        def mp_wrapper():
-            original_shape_self = self.shape
-            original_shape_other = other.shape
-
-            self.reshape([contraction_size, self.size // contraction_size])
-            other.reshape([contraction_size, other.size // contraction_size])
-
-            self.swapaxes(0, 1)
-
-            self.apply_swaps()
-            other.apply_swaps()
+        self.swapaxes(0, 1)
+        self.reshape(original_shape_self)
+        other.reshape(original_shape_other)
 
-            res.data = np.matmul(self.data, other.data).ravel()
+        if np.random.random(1)[0] < sparsification_rate and res.size > 2**14:
+            temp = np.abs(res.data.ravel())
+            max_abs = np.max(temp)
+            filter_arr = temp > max_abs*cutoff_ratio
+            res.data = res.data * filter_arr
+            res.data = res.data.reshape(res_shape)
+            res.sparsity = np.sum(filter_arr)/res.size
 
-            self.swapaxes(0, 1)
-            self.reshape(original_shape_self)
-            other.reshape(original_shape_other)
-            
-            if np.random.random(1)[0] < sparsification_rate and res.size > 2**14:
-                temp = np.abs(res.data.ravel())
-                max_abs = np.max(temp)
-                filter_arr = temp > max_abs*cutoff_ratio
-                res.data = res.data * filter_arr
-                res.data = res.data.reshape(res_shape)
-                res.sparsity = np.sum(filter_arr)/res.size
-            
-
-        if res.size > multithreading_threshold:
-            # Start the wrapper
-            res.thread = threading.Thread(target=mp_wrapper)
-            res.thread.start()
-        else:
-            mp_wrapper()
-        # Return the result
         return res
 
     # This method works similarly as it's equivalent in SparseBiArray
@@ -1121,36 +1221,22 @@ class DenseBiArray(BiArray):
     def to_dense(self):
         return self
 
-    # Generates the SparseBiArray version of self using multithreading
+    # Generates the SparseBiArray version of self
     def to_sparse(self):
-        res = SparseBiArray(
-            (np.zeros(1, dtype=np.int64), np.zeros(1)), shape=self.shape
-        )
+        self.apply_swaps()
 
-        # Prepare the wrapper
-        def mp_wrapper():
-            self.apply_swaps()
+        # Ravel init array
+        raveled_array = self.data.ravel()
 
-            # Ravel init array
-            raveled_array = self.data.ravel()
+        # Find non-zero indices
+        nz_indices = np.nonzero(raveled_array)[0]
 
-            # Find non-zero indices
-            res.nz_indices = np.nonzero(raveled_array)[0]
+        # Store data
+        data = raveled_array[nz_indices]
 
-            # Store data
-            res.data = raveled_array[res.nz_indices]
+        nz_indices, data = hlp.elim_zeros(nz_indices, data)
 
-            res.nz_indices, res.data = hlp.elim_zeros(res.nz_indices, res.data)
-
-            res.sparsity = len(res.nz_indices) / res.size
-
-        # Start the
-        if res.size > multithreading_threshold:
-            res.thread = threading.Thread(target=mp_wrapper)
-            res.thread.start()
-        else:
-            mp_wrapper()
-        return res
+        return SparseBiArray((nz_indices, data), shape=self.shape)
 
     def __repr__(self):
         return str(self.to_array())
@@ -1269,79 +1355,48 @@ def tensordot(a, b, axes, contract_sparsity_threshold=0.01):
 
     # Treat the case of a "contractionless" tensor product
     if len(axes[0]) == 0:
-        # We utilize the multithreading pattern presented in the previous contraction
-        # methods.
         if isinstance(a, SparseBiArray) and isinstance(b, SparseBiArray):
-            # Prepare result arrays
-            res = SparseBiArray(
-                (np.zeros(1, dtype=np.int64), np.ones(1)),
-                shape=list(a.shape) + list(b.shape),
-            )
-
-            # Prepare wrapper
-            def mp_wrapper():
-                # Apply any potential swaps on the source arrays
-                a.apply_swaps()
-                b.apply_swaps()
-
-                # Imagine we have two arrays with flattened nz_indices [1,2,3], [2,3,6]
-                # and sizes 16, 8  respectively
-                # the nz_indices of the result can be ordered in a matrix
-                # [1,2,3] + 2*16
-                # [1,2,3] + 3*16
-                # [1,2,3] + 6*16
-                # (where the plus is executed on all entries)
-
-                # This idea is encapsulated in the following command
-                nz_indices = np.tensordot(
-                    b.size * a.nz_indices,
-                    np.ones(len(b.data), dtype=np.int64),
-                    ((), ()),
-                ) + np.tensordot(
-                    np.ones(len(a.data), dtype=np.int64), b.nz_indices, ((), ())
-                )
-
-                # The corresponding data can be calculated as
-                data = np.tensordot(a.data.ravel(), b.data.ravel(), ((), ())).ravel()
-
-                # Set nz_indices and data
-                res.nz_indices = nz_indices.ravel()
+            # Apply any potential swaps on the source arrays
+            a.apply_swaps()
+            b.apply_swaps()
 
-                res.data = data
+            # Imagine we have two arrays with flattened nz_indices [1,2,3], [2,3,6]
+            # and sizes 16, 8  respectively
+            # the nz_indices of the result can be ordered in a matrix
+            # [1,2,3] + 2*16
+            # [1,2,3] + 3*16
+            # [1,2,3] + 6*16
+            # (where the plus is executed on all entries)
+
+            # This idea is encapsulated in the following command
+            nz_indices = np.tensordot(
+                b.size * a.nz_indices,
+                np.ones(len(b.data), dtype=np.int64),
+                ((), ()),
+            ) + np.tensordot(
+                np.ones(len(a.data), dtype=np.int64), b.nz_indices, ((), ())
+            )
 
-            if res.size > multithreading_threshold:
-                res.thread = threading.Thread(target=mp_wrapper)
-                res.thread.start()
-            else:
-                mp_wrapper()
+            # The corresponding data can be calculated as
+            data = np.tensordot(a.data.ravel(), b.data.ravel(), ((), ())).ravel()
 
-            return res
+            return SparseBiArray(
+                (nz_indices.ravel(), data),
+                shape=list(a.shape) + list(b.shape),
+            )
 
         else:
-            # For the DenseBiArray, we can simply use the numpy tensordot
-            a.catch_up()
-            b.catch_up()
+            # For the DenseBiArray, we compute the tensor product of the raveled
+            # arrays
+            a.apply_swaps()
+            b.apply_swaps()
 
-            res = DenseBiArray(
-                np.array([a.data.ravel()[0] * b.data.ravel()[0]]),
+            return DenseBiArray(
+                parallel_outer(a.to_array().ravel(), b.to_array().ravel()),
                 sparsity=a.sparsity * b.sparsity,
                 shape=list(a.shape) + list(b.shape),
             )
 
-            def mp_wrapper():
-                a.apply_swaps()
-                b.apply_swaps()
-
-                res.data = np.tensordot(a.to_array(), b.to_array(), axes=((), ()))
-
-            if res.size > multithreading_threshold:
-                res.thread = threading.Thread(target=mp_wrapper)
-                res.thread.start()
-            else:
-                mp_wrapper()
-
-            return res
-
     return a.contract(b, axes[0], axes[1])
 
 
@@ -1391,42 +1446,30 @@ def mixed_contractor(a, b, axes):
 
     res_sparsity = 1 - (1 - a.sparsity * b.sparsity) ** contraction_size
 
-    # Prepare "unfinished" result
+    # Build up sparse matrices
+    if isinstance(a, SparseBiArray):
+        mult_matrix_a = a.build_sr_matrix(
+            (contraction_size, a.size // contraction_size), transpose=True
+        )
+        b.reshape([contraction_size, b.size // contraction_size])
+        b.apply_swaps()
+        mult_matrix_b = b.data
+
+    else:
+        a.reshape([contraction_size, a.size // contraction_size])
+        a.swapaxes(0, 1)
+        a.apply_swaps()
+        mult_matrix_a = a.data
+        mult_matrix_b = b.build_sr_matrix(
+            (contraction_size, b.size // contraction_size)
+        )
+
     res = DenseBiArray(
         np.empty(1, dtype=a.data.dtype), sparsity=res_sparsity, shape=res_shape
     )
 
-    # Define multi processing wrapper
-    def mp_wrapper():
-        # Build up sparse matrices
-        if isinstance(a, SparseBiArray):
-            mult_matrix_a = a.build_sr_matrix(
-                (contraction_size, a.size // contraction_size), transpose=True
-            )
-            original_shape_b = b.shape
-            b.reshape([contraction_size, b.size // contraction_size])
-            b.apply_swaps()
-            mult_matrix_b = b.data
-
-        else:
-            original_shape_a = a.shape
-            a.reshape([contraction_size, a.size // contraction_size])
-            a.swapaxes(0, 1)
-            a.apply_swaps()
-            mult_matrix_a = a.data
-            mult_matrix_b = b.build_sr_matrix(
-                (contraction_size, b.size // contraction_size)
-            )
-
-        # Set the data
-        res.data = sparse_matrix_mult(mult_matrix_a, mult_matrix_b)
-
-    # Start the thead
-    if res.size > multithreading_threshold:
-        res.thread = threading.Thread(target=mp_wrapper)
-        res.thread.start()
-    else:
-        mp_wrapper()
+    # Set the data
+    res.data = sparse_matrix_mult(mult_matrix_a, mult_matrix_b)
 
     return res
 
@@ -115,7 +115,7 @@ class GroupedInstruction:
 
 # The idea is now to iterate through different groupings and find the one with the most
 # gain.
-def group_qc(qc):
+def group_qc(qc, index_dict=None):
     # This parameter describes how deep the search for good groupings should go
     max_recursion_depth = optimal_grouping_recursion_parameter(len(qc.qubits)) + 12
 
@@ -125,7 +125,7 @@ def group_qc(qc):
     # We now succesively remove gates from the front of the circuit that either
     # have been determined as group or can't be grouped (because they are non-unitary)
 
-    int_qc = IntegerCircuit(qc)
+    int_qc = IntegerCircuit(qc, index_dict)
     while qc.data:
         # If the instruction is non unitary, remove
         # if qc.data[0].op.name in ["measure", "reset", "disentangle"] or
@@ -218,7 +218,7 @@ def find_grouping_options(
     for i in range(len(expansion_options)):
         # Calculate the hash of the proposed set of qubits
         # proposed_set = sum([hash(qb) for qb in qubits + [expansion_options[i]]])
-        proposed_set = qubits | qb_set_to_int([expansion_options[i]], int_qc.source)
+        proposed_set = qubits | qb_set_to_int([expansion_options[i]], int_qc.index_dict)
         # proposed_set = qubits.union(BinaryQubitSet([expansion_options[i]], qc.source))
 
         # If this set has not been checked yet, add to the options
@@ -511,23 +511,15 @@ def delete_multiple_element(list_object, indices):
             list_object.pop(idx)
 
 
-def qb_set_to_int(qubits, qc):
+def qb_set_to_int(qubits, index_dict):
     res = 0
     for qb in qubits:
-        res |= 1 << qc.qubits.index(qb)
+        res |= 1 << index_dict[qb]
     return res
 
 
-def qc_to_int_list(qc):
-    res_list = []
-    for instr in qc.data:
-        res_list.append(qb_set_to_int(instr.qubits, qc))
-        if instr.op.name in ["measure", "reset", "disentangle"] or (
-            isinstance(instr.op, ClControlledOperation)
-        ):
-            res_list[-1] *= -1
-
-    return res_list
+def qc_to_int_list(qc, index_dict=None):
+    return LoweredCircuit(qc, index_dict).qubit_ints()
 
 
 # Copy set in order to prevent modification
@@ -682,17 +674,133 @@ def binary_get_circuit_block(int_qc_list, qubits, n, established_indices):
 
 def int_to_qb_set(integer, qc):
     res = []
-    for i in range(len(qc.qubits)):
-        if int(integer) & (1 << i):
-            res.append(qc.qubits[i])
+    integer = int(integer)
+    # Iterate only over the set bits instead of every qubit of the circuit
+    while integer:
+        lowest_bit = integer & -integer
+        res.append(qc.qubits[lowest_bit.bit_length() - 1])
+        integer ^= lowest_bit
 
     return res
 
 
+# Opcodes of the LoweredCircuit representation
+UNITARY_OPCODE = 0
+DISENTANGLE_OPCODE = 1
+MEASURE_OPCODE = 2
+RESET_OPCODE = 3
+CL_CONTROLLED_OPCODE = 4
+
+non_unitary_opcodes = {
+    "disentangle": DISENTANGLE_OPCODE,
+    "measure": MEASURE_OPCODE,
+    "reset": RESET_OPCODE,
+}
+
+
+def get_index_dict(bits):
+    return {bits[i]: i for i in range(len(bits))}
+
+
+# This class lowers a QuantumCircuit into an integer representation for the
+# preprocessing steps and the main loop of the simulator.
+# Determining the index of a qubit via qc.qubits.index is a linear search, which
+# (when performed for every qubit of every gate) dominates the runtime for large
+# circuits before any numerics happen. We therefore build the dictionaries
+# {qubit : index} once and describe every instruction by
+# - an opcode (unitary, disentangler, measurement, reset or classically controlled)
+# - the integer indices of the qubits/clbits it acts on
+# - a parameter slot, ie. the index of the Operation object in self.op_list
+# Everything is stored in plain Python lists, since the consumers iterate over the
+# instructions in Python anyway.
+
+# What is shared across the simulation pipeline are the index dictionaries
+# (they stay valid as long as the circuits share a prefix of their qubit list).
+# The lowering itself is not shared, because the preprocessing creates new
+# instructions: group_qc lowers the transpiled circuit and
+# insert_multiverse_measurements lowers the grouped circuit and builds the lowering
+# of its output incrementally (via the append method). This last lowering is the
+# one that the main loop iterates over.
+class LoweredCircuit:
+    def __init__(self, qc, index_dict=None, cl_index_dict=None, data=None):
+        if index_dict is None:
+            index_dict = get_index_dict(qc.qubits)
+        if cl_index_dict is None:
+            cl_index_dict = get_index_dict(qc.clbits)
+        if data is None:
+            data = qc.data
+
+        self.source = qc
+        self.index_dict = index_dict
+        self.cl_index_dict = cl_index_dict
+
+        self.opcodes = []
+        self.param_slots = []
+        self.qubit_indices = []
+        self.clbit_indices = []
+
+        # Operations that appear multiple times (for instance the disentangler) share
+        # their parameter slot
+        self.op_list = []
+        self.slot_dict = {}
+
+        for instr in data:
+            self.append(instr)
+
+    def append(self, instr):
+        op = instr.op
+
+        try:
+            self.param_slots.append(self.slot_dict[id(op)])
+        except KeyError:
+            self.slot_dict[id(op)] = len(self.op_list)
+            self.param_slots.append(len(self.op_list))
+            self.op_list.append(op)
+
+        if isinstance(op, ClControlledOperation):
+            self.opcodes.append(CL_CONTROLLED_OPCODE)
+        else:
+            self.opcodes.append(non_unitary_opcodes.get(op.name, UNITARY_OPCODE))
+
+        index_dict = self.index_dict
+        cl_index_dict = self.cl_index_dict
+        self.qubit_indices.append([index_dict[qb] for qb in instr.qubits])
+        self.clbit_indices.append([cl_index_dict[cb] for cb in instr.clbits])
+
+    def __len__(self):
+        return len(self.opcodes)
+
+    def ops(self):
+        op_list = self.op_list
+        return [op_list[slot] for slot in self.param_slots]
+
+    # Sum of 2**(qubit count) over all instructions (used for the progress bar)
+    def total_flops(self):
+        return sum(1 << len(qubit_indices) for qubit_indices in self.qubit_indices)
+
+    # Returns the representation used by the IntegerCircuit class, ie. each
+    # instruction is described by an integer, which has the bits of the participating
+    # qubits set. Non-unitary instructions are indicated by a negative sign.
+    def qubit_ints(self):
+        res_list = []
+        for qubit_indices, opcode in zip(self.qubit_indices, self.opcodes):
+            qubit_int = 0
+            for j in qubit_indices:
+                qubit_int |= 1 << j
+            if opcode != UNITARY_OPCODE:
+                qubit_int *= -1
+            res_list.append(qubit_int)
+
+        return res_list
+
+
 class IntegerCircuit:
-    def __init__(self, qc):
+    def __init__(self, qc, index_dict=None):
+        if index_dict is None:
+            index_dict = get_index_dict(qc.qubits)
         self.source = qc
-        self.data = qc_to_int_list(qc)
+        self.index_dict = index_dict
+        self.data = qc_to_int_list(qc, index_dict)
         self.n = len(qc.qubits)
 
 
@@ -741,52 +849,84 @@ def extract_measurements(qc):
     return new_qc, mes_list
 
 
-def insert_multiverse_measurements(qc):
+# This function replaces measurements (and resets) that are followed by further
+# non-permeable operations with CX gates onto newly added qubits, such that all
+# measurements can be performed at the end of the simulation.
+# If index_dict is given, it is EXTENDED IN PLACE by the qubits that are added to qc.
+# Besides the modified circuit and the list of measurements, this function returns
+# the LoweredCircuit of the modified circuit, which is built while the new
+# instructions are generated.
+def insert_multiverse_measurements(qc, index_dict=None):
     
     new_data = []
     new_measurements = []
     
     cb_to_qb_dic = {}
     
-    data = list(qc.data)
-    while data:
-    # for i in range(len(qc.data)):
+    if index_dict is None:
+        index_dict = get_index_dict(qc.qubits)
+    
+    # The membership checks below are performed on the lowered representation
+    # (integer qubit/clbit indices) instead of the Qubit objects
+    lowered_qc = LoweredCircuit(qc, index_dict)
+    
+    data = qc.data
+    qubit_lists = lowered_qc.qubit_indices
+    clbit_lists = lowered_qc.clbit_indices
+    
+    # The lowering of the resulting circuit is built alongside the new instructions
+    res_lowered_qc = LoweredCircuit(qc, index_dict, lowered_qc.cl_index_dict, data = [])
+    
+    def append_instr(instr):
+        new_data.append(instr)
+        res_lowered_qc.append(instr)
+    
+    # Resets that have been merged into a preceding measurement are marked here
+    removed = [False]*len(data)
+    
+    for i in range(len(data)):
         
-        instr = data.pop(0)
-        # instr = qc.data[i]
+        if removed[i]:
+            continue
+        
+        instr = data[i]
         if instr.op.name == "measure":
             meas_qubit = instr.qubits[0]
-            meas_clbit = instr.clbits[0]
+            meas_index = qubit_lists[i][0]
+            meas_cl_index = clbit_lists[i][0]
             
             next_instr_is_reset = False
-            for j in range(len(data)):
-                if meas_qubit in data[j].qubits:
+            for j in range(i+1, len(data)):
+                if removed[j]:
+                    continue
+                if meas_index in qubit_lists[j]:
                     
                     if data[j].op.name == "reset":
                         next_instr_is_reset = True
-                        data.pop(j)
+                        removed[j] = True
                         break
-                    elif not is_permeable(data[j].op, [data[j].qubits.index(meas_qubit)]):
+                    elif not is_permeable(data[j].op, [qubit_lists[j].index(meas_index)]):
                         break
-                if meas_clbit in data[j].clbits and not isinstance(data[j], ClControlledOperation):
+                if meas_cl_index in clbit_lists[j] and not isinstance(data[j], ClControlledOperation):
                         break
                 
                 # This treats the case that two measurements with the same outcome are performed
                 # in this case we break the loop to make the first measurement appear as a
                 # separate qubit.
-                if data[j].op.name == "measure" and data[j].qubits[0] == meas_qubit:
+                if data[j].op.name == "measure" and qubit_lists[j][0] == meas_index:
                     break
             else:
-                new_data.append(Instruction(disentangler, [meas_qubit]))
+                append_instr(Instruction(disentangler, [meas_qubit]))
                 new_measurements.append((instr.qubits[0], instr.clbits[0]))
                 continue
             
             qb = qc.add_qubit()
-            new_data.append(Instruction(CXGate(), instr.qubits + [qb]))
+            index_dict[qb] = len(qc.qubits) - 1
+            append_instr(Instruction(CXGate(), instr.qubits + [qb]))
             
             if next_instr_is_reset:
-                new_data.append(Instruction(CXGate(), [qb] + instr.qubits))
-                new_data.append(Instruction(disentangler, [meas_qubit]))
+                append_instr(Instruction(CXGate(), [qb] + instr.qubits))
+                append_instr(Instruction(disentangler, [meas_qubit]))
             
             cb_to_qb_dic[instr.clbits[0]] = qb
             
@@ -796,19 +936,23 @@ def insert_multiverse_measurements(qc):
         elif instr.op.name == "reset":
             
             meas_qubit = instr.qubits[0]
-            new_data.append(Instruction(Disentangler(warning = False), [meas_qubit]))
+            meas_index = qubit_lists[i][0]
+            append_instr(Instruction(Disentangler(warning = False), [meas_qubit]))
             
-            for j in range(len(data)):
-                if meas_qubit in data[j].qubits:
-                    if not is_permeable(data[j].op, [data[j].qubits.index(meas_qubit)]):
+            for j in range(i+1, len(data)):
+                if removed[j]:
+                    continue
+                if meas_index in qubit_lists[j]:
+                    if not is_permeable(data[j].op, [qubit_lists[j].index(meas_index)]):
                         break
             else:
                 continue
             
             qb = qc.add_qubit()
-            new_data.append(Instruction(CXGate(), instr.qubits + [qb]))
-            new_data.append(Instruction(CXGate(), [qb] + instr.qubits))
-            new_data.append(Instruction(Disentangler(), [qb]))
+            index_dict[qb] = len(qc.qubits) - 1
+            append_instr(Instruction(CXGate(), instr.qubits + [qb]))
+            append_instr(Instruction(CXGate(), [qb] + instr.qubits))
+            append_instr(Instruction(Disentangler(), [qb]))
         
         elif isinstance(instr.op, ClControlledOperation):
             
@@ -824,20 +968,21 @@ def insert_multiverse_measurements(qc):
                         break
                     else:
                         qb = qc.add_qubit()
+                        index_dict[qb] = len(qc.qubits) - 1
                         new_qubits.append(qb)
                         control_qubits.append(qb)
                 else:
                     control_qubits.append(cb_to_qb_dic[cb])
             else:
-                new_data.append(Instruction(instr.op.base_op.control(len(control_qubits), 
+                append_instr(Instruction(instr.op.base_op.control(len(control_qubits), 
                                                                      ctrl_state = ctrl_state), 
                                             control_qubits + instr.qubits))
             
             for qb in control_qubits:
-                new_data.append(Instruction(disentangler, [qb]))
+                append_instr(Instruction(disentangler, [qb]))
         
         else:
-            new_data.append(instr)
+            append_instr(instr)
         
     
     for cb, qb in cb_to_qb_dic.items():
@@ -850,11 +995,11 @@ def insert_multiverse_measurements(qc):
         measurements.append(Instruction(Measurement(), [qb], [cb]))
     qc.data = new_data
     
-    return qc, measurements
+    return qc, measurements, res_lowered_qc
             
 
 # Wrapping function for all preproccessing operations
-def circuit_preprocessor(qc):
+def circuit_preprocessor(qc, index_dict=None):
     
     from qrisp.simulator import reorder_circuit
     if len(qc.data) == 0:
@@ -863,6 +1008,6 @@ def circuit_preprocessor(qc):
     # TO-DO find reliable classifiaction when automatic disentangling works best
     if len(qc.qubits) > 45:
         qc = insert_disentangling(qc)
-    qc = group_qc(qc)
+    qc = group_qc(qc, index_dict)
     
     return reorder_circuit(qc, ["measure", "reset", "disentangle"])
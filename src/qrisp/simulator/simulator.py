@@ -30,75 +30,225 @@ from qrisp.simulator.circuit_preprocessing import (
     circuit_preprocessor,
     count_measurements_and_treat_alloc,
     group_qc,
-    insert_multiverse_measurements
+    insert_multiverse_measurements,
+    get_index_dict,
+    LoweredCircuit,
+    DISENTANGLE_OPCODE,
+    MEASURE_OPCODE,
+    RESET_OPCODE,
+    CL_CONTROLLED_OPCODE,
 )
 
 from qrisp.simulator.quantum_state import QuantumState
+from qrisp.circuit.parametric_template import PreparedTemplate
 
 # This functions determines the quantum state after executing a quantum circuit
 # and afterwards extracts the probability of measuring certain bit strings
-def run(qc, shots, token="", iqs=None, insert_reset=True):
+# If return_arrays is True, the result is not given as a dictionary of bit strings but
+# as a tuple of NumPy arrays (outcomes, probabilities), where the outcomes are the
+# integers represented by the bit strings (compare PreparedCircuit.run).
+def run(qc, shots, token="", iqs=None, insert_reset=True, return_arrays=False):
     
     if len(qc.data) == 0:
+        if return_arrays:
+            return np.zeros(1, dtype=np.int64), np.ones(1)
         return {"": shots}
     if shots == 0:
+        if return_arrays:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
         return {}
     
+    prepared_qc = PreparedCircuit(qc, insert_reset=insert_reset)
     
-    progress_bar = tqdm(
-        desc=f"Simulating {len(qc.qubits)} qubits..",
-        bar_format="{desc} |{bar}| [{percentage:3.0f}%]",
-        ncols=85,
-        leave=False,
-        delay=0.1,
-        position=0,
-        smoothing=1,
-        file=sys.stdout
-    )
+    return prepared_qc.run(shots, iqs=iqs, return_arrays=return_arrays)
+
+
+# This function executes a parametrized circuit for a batch of parameter values.
+# The circuit preprocessing and the simulation of the parameter independent
+# instructions at the beginning of the circuit are performed only once
+# (compare qrisp.ParametricTemplate). The remaining simulations can be distributed
+# over a pool of processes.
+def run_batch(qc, parameters, shots=None, symbols=None, processes=None):
+    """
+    Simulates a parametrized QuantumCircuit for a batch of parameter values.
+
+    Parameters
+    ----------
+    qc : QuantumCircuit or ParametricTemplate
+        The parametrized circuit (including measurements).
+    parameters : list[dict] or numpy.ndarray
+        The parameter values. Either a list of dictionaries of the type
+        {sympy.Symbol : float} or an array of shape (batch size, parameter amount),
+        where the columns are ordered like ``symbols``.
+    shots : int, optional
+        The amount of shots per parameter set. By default, the probabilities are
+        returned (in the same format as the ``run`` function).
+    symbols : list[sympy.Symbol], optional
+        The order of the parameters (only relevant if ``qc`` is a QuantumCircuit).
+        By default, the parameters are sorted by name.
+    processes : int, optional
+        The amount of worker processes. By default, the batch is simulated in the
+        calling process.
+
+    Returns
+    -------
+    list[dict]
+        The counts dictionaries in the order of ``parameters``.
+
+    Examples
+    --------
+
+    >>> import numpy as np
+    >>> from qrisp import QuantumCircuit
+    >>> from qrisp.simulator import run_batch
+    >>> from sympy import Symbol
+    >>> phi = Symbol("phi")
+    >>> qc = QuantumCircuit(1, 1)
+    >>> qc.rx(phi, 0)
+    >>> qc.measure(0, 0)
+    >>> run_batch(qc, [{phi : 0}, {phi : np.pi}])
+    [{'0': 100000}, {'1': 100000}]
+
+    """
+    from qrisp.circuit import ParametricTemplate
     
-    LINE_CLEAR = "\x1b[2K"
-    progress_bar.display()
-
-    # This command enables fast appending. Fast appending means that the .append method
-    # of the QuantumCircuit class checks much less validity conditions and is also less
-    # tolerant regarding inputs.
-    with fast_append(2):
-
-        qc = qc.transpile()
-
-        # Count the amount of measurements (we can stop the simulation after all
-        # measurements are performed)
-        measurement_amount = count_measurements_and_treat_alloc(
-            qc, insert_reset=insert_reset
-        )
-
-        # Apply circuit preprocessing more
-        qc = circuit_preprocessor(qc)
-
-        measurement_counter = 0
-
-        for i in range(len(qc.data)):
-            if qc.data[i].op.name == "measure":
-                measurement_counter += 1
-            if measurement_counter == measurement_amount:
-                break
+    if isinstance(qc, ParametricTemplate):
+        template = qc
+    else:
+        template = ParametricTemplate(qc, symbols)
+    
+    if None not in template.prepared_circuits:
+        template.prepared_circuits[None] = PreparedTemplate(template)
+    
+    prepared_template = template.prepared_circuits[None]
+    
+    parameters = [template.get_parameter_array(theta) for theta in parameters]
+    
+    # Simulate the parameter independent prefix before the workers are forked
+    prepared_template.get_prefix_state()
+    
+    if processes is None or processes < 2 or len(parameters) < 2:
+        return [batch_worker((template, prepared_template, theta, shots)) 
+                for theta in parameters]
+    
+    # The workers are forked such that they inherit the prepared circuit and the
+    # prefix state instead of receiving them pickled. Only the parameter arrays and
+    # the results are transferred.
+    import multiprocessing
+    
+    if "fork" not in multiprocessing.get_all_start_methods():
+        return [batch_worker((template, prepared_template, theta, shots)) 
+                for theta in parameters]
+    
+    global batch_data
+    batch_data = (template, prepared_template)
+    
+    try:
+        with multiprocessing.get_context("fork").Pool(processes) as pool:
+            return pool.map(batch_worker, [(None, None, theta, shots) for theta in parameters])
+    finally:
+        batch_data = None
 
-        qc.data = qc.data[: i + 1]
 
-        # Counter to track how many measurements have been performed
-        measurement_counter = 0
+batch_data = None
 
-        # Main loop - this loop successively executes operations onto the impure
-        # quantum state object
+def batch_worker(args):
+    template, prepared_template, theta, shots = args
+    
+    if template is None:
+        template, prepared_template = batch_data
+    
+    return prepared_template.run(template.bind_operations(theta), shots)
+
+
+# This class performs the preprocessing steps of the run function and stores the
+# result. The execution (main loop, measurement and sampling) is performed by the
+# run method and can be repeated.
+# Preparing once and executing several times is useful if the circuit is executed for
+# several different parameter values (compare qrisp.ParametricTemplate): The
+# preprocessing only depends on the structure of the circuit. The run method therefore
+# accepts a replacement for the op_list attribute of the LoweredCircuit, which contains
+# the (bound) operations for the respective parameter values. The unitaries of the
+# operations that are not replaced are only calculated once.
+class PreparedCircuit:
+    def __init__(self, qc, insert_reset=True):
         
-        mes_list = []
+        # This command enables fast appending. Fast appending means that the .append
+        # method of the QuantumCircuit class checks much less validity conditions and
+        # is also less tolerant regarding inputs.
+        with fast_append(2):
+    
+            qc = qc.transpile()
+    
+            # Count the amount of measurements (we can stop the simulation after all
+            # measurements are performed)
+            measurement_amount = count_measurements_and_treat_alloc(
+                qc, insert_reset=insert_reset
+            )
+    
+            # Determine the qubit indices once. This dictionary is shared by the
+            # preprocessing steps and the lowering of the circuit for the main loop.
+            index_dict = get_index_dict(qc.qubits)
+    
+            # Apply circuit preprocessing more
+            qc = circuit_preprocessor(qc, index_dict)
+    
+            measurement_counter = 0
+    
+            for i in range(len(qc.data)):
+                if qc.data[i].op.name == "measure":
+                    measurement_counter += 1
+                if measurement_counter == measurement_amount:
+                    break
+    
+            qc.data = qc.data[: i + 1]
+            
+            mes_list = []
+            
+            # if len(qc.qubits) < 30 or True:
+                # qc, mes_list = extract_measurements(qc)
+            
+            # This call extends index_dict by the qubits it adds and returns the
+            # lowered representation of the resulting circuit
+            qc, new_mes_list, lowered_qc = insert_multiverse_measurements(qc, index_dict)
+            
+            mes_list = mes_list + new_mes_list
+        
+        cl_index_dict = lowered_qc.cl_index_dict
+        mes_list.sort(key = lambda x : -cl_index_dict[x.clbits[0]])
+        
+        self.qc = qc
+        self.lowered_qc = lowered_qc
+        self.measurement_amount = measurement_amount
+        self.mes_list = mes_list
+        self.mes_qubit_indices = [index_dict[instr.qubits[0]] for instr in mes_list]
         
-        # if len(qc.qubits) < 30 or True:
-            # qc, mes_list = extract_measurements(qc)
+    # If iqs is given, the simulation continues on this state (which is modified in
+    # place) starting with the instruction of index start
+    # If return_arrays is True, the outcomes are returned as a tuple of NumPy arrays
+    # (outcomes, probabilities) instead of a dictionary of bit strings. This skips the
+    # string formatting, which dominates for large amounts of measured qubits. The
+    # outcomes are the integers represented by the bit strings of the dictionary, ie.
+    # the most significant bit belongs to the last clbit. If shots is None, the exact
+    # probabilities are returned, otherwise the sampled counts.
+    def run(self, shots, iqs=None, op_list=None, start=0, return_arrays=False):
         
-        qc, new_mes_list = insert_multiverse_measurements(qc)
+        qc = self.qc
+        mes_list = self.mes_list
         
-        mes_list = mes_list + new_mes_list
+        progress_bar = tqdm(
+            desc=f"Simulating {len(qc.qubits)} qubits..",
+            bar_format="{desc} |{bar}| [{percentage:3.0f}%]",
+            ncols=85,
+            leave=False,
+            delay=0.1,
+            position=0,
+            smoothing=1,
+            file=sys.stdout
+        )
+        
+        LINE_CLEAR = "\x1b[2K"
+        progress_bar.display()
             
         if iqs is None:
             # Create impure quantum state object. This object tracks multiple decoherent
@@ -106,54 +256,17 @@ def run(qc, shots, token="", iqs=None, insert_reset=True):
             # iqs = ImpureQuantumState(len(qc.qubits), clbit_amount=len(qc.clbits))
             iqs = QuantumState(len(qc.qubits))
         
-        mes_qubit_indices = []
-        mes_clbit_indices = []
+        progress_bar.total = sum(
+            1 << len(qubit_indices) 
+            for qubit_indices in self.lowered_qc.qubit_indices[start:]
+            )
         
-        total_flops = 0
-        for i in range(len(qc.data)):
-            total_flops += 2 ** qc.data[i].op.num_qubits
+        self.evolve(iqs, op_list, start, progress_bar = progress_bar)
         
-        progress_bar.total = total_flops
-        for i in range(len(qc.data)):
-            # Set alias for the instruction of this operation
-            instr = qc.data[i]
-            progress_bar.update(2**instr.op.num_qubits)
-            # Gather the indices of the qubits from the circuits (i.e. integers instead
-            # of the identifier strings)
-            qubit_indices = [qc.qubits.index(qb) for qb in instr.qubits]
-
-            # Perform instructions
-
-            # Disentangling describes an operation, which mean that the superposition of
-            # two states can be safely treated as two decoherent states. This is
-            # advantageous because it might be possible that the amplitude of one
-            # state is 0, which means that we halfed the workload. Even if both states
-            # have non-zero amplitude, this still yields an improvement because
-            # computing two decoherent states is more easily parallelized than the
-            # combined coherent state
-            if instr.op.name == "disentangle":
-                # iqs.reset(qubit_indices[0], True)
-                iqs.disentangle(qubit_indices[0], warning = instr.op.warning)
-
-            # If the operation is unitary, we apply this unitary on to the required
-            # qubit indices
-            else:
-
-                iqs.apply_operation(instr.op, qubit_indices)
-
-            # If all measurements have been performed, break
-            if measurement_counter == measurement_amount:
-                break
-
-
-        mes_list.sort(key = lambda x : -qc.clbits.index(x.clbits[0]))
+        mes_qubit_indices = self.mes_qubit_indices
         
-        for instr in mes_list:
-            mes_qubit_indices.append(qc.qubits.index(instr.qubits[0]))
-            
         if len(mes_qubit_indices):
             outcome_list, cl_prob = iqs.multi_measure(mes_qubit_indices[::-1], return_res_states = False)
-            mes_qubit_indices = []
 
         progress_bar.close()
         print("\r" + 85*" ", end=LINE_CLEAR + "\r")
@@ -166,6 +279,22 @@ def run(qc, shots, token="", iqs=None, insert_reset=True):
         norm = np.sum(cl_prob)
         cl_prob = cl_prob/norm
         
+        if return_arrays:
+            # For 63 or more measured qubits, multi_measure returns Python integers
+            if isinstance(outcome_list, list):
+                outcome_array = np.empty(len(outcome_list), dtype=object)
+                outcome_array[:] = outcome_list
+            else:
+                outcome_array = outcome_list
+            
+            if shots is None:
+                return outcome_array, cl_prob
+            
+            temp = gen_res_dict(np.random.choice(len(cl_prob), shots, p=cl_prob))
+            
+            return (outcome_array[np.array(list(temp.keys()), dtype=np.int64)], 
+                    np.array(list(temp.values())))
+        
         res = {}
         #If shots >= 1000000, no samples will be drawn and the distribution will
         #be returned instead
@@ -200,6 +329,65 @@ def run(qc, shots, token="", iqs=None, insert_reset=True):
         
         return res
 
+    # Applies the instructions of the lowered circuit with indices in [start, stop) to
+    # the quantum state iqs. op_list can be given to replace the op_list attribute of
+    # the lowered circuit.
+    def evolve(self, iqs, op_list=None, start=0, stop=None, progress_bar=None):
+        
+        lowered_qc = self.lowered_qc
+        
+        if stop is None:
+            stop = len(lowered_qc)
+        
+        # Counter to track how many measurements have been performed
+        measurement_counter = 0
+
+        # Main loop - this loop successively executes operations onto the impure
+        # quantum state object
+        
+        # The main loop only iterates over opcodes, qubit indices and operations of
+        # the lowered circuit
+        opcodes = lowered_qc.opcodes
+        qubit_index_lists = lowered_qc.qubit_indices
+        
+        if op_list is None:
+            op_list = lowered_qc.op_list
+        param_slots = lowered_qc.param_slots
+        
+        for i in range(start, stop):
+            # Set alias for the operation and the qubit indices of this instruction
+            op = op_list[param_slots[i]]
+            qubit_indices = qubit_index_lists[i]
+            
+            if progress_bar is not None:
+                progress_bar.update(1 << len(qubit_indices))
+
+            # Perform instructions
+
+            # Disentangling describes an operation, which mean that the superposition of
+            # two states can be safely treated as two decoherent states. This is
+            # advantageous because it might be possible that the amplitude of one
+            # state is 0, which means that we halfed the workload. Even if both states
+            # have non-zero amplitude, this still yields an improvement because
+            # computing two decoherent states is more easily parallelized than the
+            # combined coherent state
+            if opcodes[i] == DISENTANGLE_OPCODE:
+                # iqs.reset(qubit_indices[0], True)
+                iqs.disentangle(qubit_indices[0], warning = op.warning)
+
+            # If the operation is unitary, we apply this unitary on to the required
+            # qubit indices
+            else:
+
+                iqs.apply_operation(op, qubit_indices)
+
+            # If all measurements have been performed, break
+            if measurement_counter == self.measurement_amount:
+                break
+        
+        return iqs
+
+
 @njit
 def gen_res_dict(samples):
     
@@ -253,8 +441,10 @@ def statevector_sim(qc):
                 "measurement"
             )
 
+        index_dict = get_index_dict(qc.qubits)
+
         # Apply circuit preprocessing more
-        qc = group_qc(qc)
+        qc = group_qc(qc, index_dict)
 
         if len(qc.data) == 0:
             res = np.zeros(2 ** len(qc.qubits), dtype=np.complex64)
@@ -267,25 +457,22 @@ def statevector_sim(qc):
 
         qs = QuantumState(len(qc.qubits))
 
-        total_flops = 0
-        for i in range(len(qc.data)):
-            total_flops += 2 ** qc.data[i].op.num_qubits
+        # Lower the circuit into the integer representation
+        lowered_qc = LoweredCircuit(qc, index_dict)
+        qubit_index_lists = lowered_qc.qubit_indices
+        ops = lowered_qc.ops()
 
-        progress_bar.total = total_flops
+        progress_bar.total = lowered_qc.total_flops()
 
         # Main loop - this loop successively executes operations onto the impure
         # quantum state object
-        for i in range(len(qc.data)):
-            # Set alias for the instruction of this operation
-            instr = qc.data[i]
+        for i in range(len(lowered_qc)):
+            qubit_indices = qubit_index_lists[i]
 
-            progress_bar.update(2**instr.op.num_qubits)
-            # Gather the indices of the qubits from the circuits (i.e. integers instead
-            # of the identifier strings)
-            qubit_indices = [qc.qubits.index(qb) for qb in instr.qubits]
+            progress_bar.update(1 << len(qubit_indices))
 
             # Perform instructions
-            qs.apply_operation(instr.op, qubit_indices)
+            qs.apply_operation(ops[i], qubit_indices)
 
         res = qs.eval().tensor_array.to_array()
 
@@ -313,10 +500,19 @@ def single_shot_sim(qc, quantum_state=None):
 
         from qrisp.simulator import reorder_circuit
 
-        qc = group_qc(qc)
+        index_dict = get_index_dict(qc.qubits)
+
+        qc = group_qc(qc, index_dict)
 
         qc = reorder_circuit(qc, ["measure", "reset", "disentangle"])
 
+        # Lower the circuit into the integer representation
+        lowered_qc = LoweredCircuit(qc, index_dict)
+        opcodes = lowered_qc.opcodes
+        qubit_index_lists = lowered_qc.qubit_indices
+        clbit_index_lists = lowered_qc.clbit_indices
+        ops = lowered_qc.ops()
+
         if quantum_state is None:
             # Create quantum state object.
             quantum_state = QuantumState(len(qc.qubits))
@@ -337,30 +533,27 @@ def single_shot_sim(qc, quantum_state=None):
             # pre_calc_unitaries()
 
             pre_calc_thr = threading.Thread(
-                target=pre_calc_unitaries, args=(qc.data[0].op,)
+                target=pre_calc_unitaries, args=(ops[0],)
             )
             pre_calc_thr.start()
 
         # Main loop - this loop successively executes operations onto the impure
         # quantum state object
-        for i in range(len(qc.data)):
+        for i in range(len(lowered_qc)):
             pre_calc_thr.join()
 
-            if i < len(qc.data) - 1:
+            if i < len(lowered_qc) - 1:
                 pre_calc_thr = threading.Thread(
-                    target=pre_calc_unitaries, args=(qc.data[i + 1].op,)
+                    target=pre_calc_unitaries, args=(ops[i + 1],)
                 )
                 pre_calc_thr.start()
 
-            # Set alias for the instruction of this operation
-            instr = qc.data[i]
-
-            # Gather the indices of the qubits from the circuits (i.e. integers instead
-            # of the identifier strings)
-            qubit_indices = [qc.qubits.index(qb) for qb in instr.qubits]
+            # Set alias for the operation and the qubit indices of this instruction
+            op = ops[i]
+            qubit_indices = qubit_index_lists[i]
 
             # Perform instructions
-            if instr.op.name == "reset":
+            if opcodes[i] == RESET_OPCODE:
                 quantum_state.measure(qubit_indices[0])
 
                 p_0, state_0, p_1, state_1 = quantum_state.last_mes_outcome
@@ -380,7 +573,7 @@ def single_shot_sim(qc, quantum_state=None):
             # decoherent states is more easily parallelized than the combined coherent
             # state.
 
-            elif instr.op.name == "measure":
+            elif opcodes[i] == MEASURE_OPCODE:
                 quantum_state.measure(qubit_indices[0])
 
                 p_0, state_0, p_1, state_1 = quantum_state.last_mes_outcome
@@ -391,14 +584,14 @@ def single_shot_sim(qc, quantum_state=None):
                     quantum_state = state_0
                 else:
                     quantum_state = state_1
-                    result_str[qc.clbits.index(instr.clbits[0])] = "1"
+                    result_str[clbit_index_lists[i][0]] = "1"
 
-            elif instr.op.name[:4] == "c_if":
-                if result_str[qc.clbits.index(instr.clbits[0])] == "1":
-                    quantum_state.apply_operation(instr.op, qubit_indices)
+            elif opcodes[i] == CL_CONTROLLED_OPCODE:
+                if result_str[clbit_index_lists[i][0]] == "1":
+                    quantum_state.apply_operation(op, qubit_indices)
             # If the operation is unitary, we apply this unitary on to the required qubit
             # indices
             else:
-                quantum_state.apply_operation(instr.op, qubit_indices)
+                quantum_state.apply_operation(op, qubit_indices)
 
         return "".join(result_str)[::-1], quantum_state
@@ -69,6 +69,23 @@ def u3matrix(theta, phi, lam, global_phase, use_sympy = False):
     return res*exp_gphase
 
 
+# Vectorized version of u3matrix for float arrays of parameters. Returns an array of
+# shape (len(theta), 2, 2) containing the unitaries.
+def u3matrix_batch(theta, phi, lam, global_phase):
+    res = numpy.empty(shape=(len(theta), 2, 2), dtype=np_dtype)
+
+    cos = numpy.cos(theta / 2)
+    sin = numpy.sin(theta / 2)
+    exp_gphase = numpy.exp(1j * global_phase)
+
+    res[:, 0, 0] = exp_gphase * cos
+    res[:, 0, 1] = -exp_gphase * numpy.exp(1j * lam) * sin
+    res[:, 1, 0] = exp_gphase * numpy.exp(1j * phi) * sin
+    res[:, 1, 1] = exp_gphase * numpy.exp(1j * (phi + lam)) * cos
+
+    return res
+
+
 # Efficient function to generate the unitary of a controlled gate
 def controlled_unitary(controlled_gate):
     m = controlled_gate.base_operation.num_qubits
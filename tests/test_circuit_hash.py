@@ -0,0 +1,58 @@
+"""
+\********************************************************************************
+* Copyright (c) 2023 the Qrisp authors
+*
+* This program and the accompanying materials are made available under the
+* terms of the Eclipse Public License 2.0 which is available at
+* http://www.eclipse.org/legal/epl-2.0.
+*
+* This Source Code may also be made available under the following Secondary
+* Licenses when the conditions for such availability set forth in the Eclipse
+* Public License, v. 2.0 are satisfied: GNU General Public License, version 2
+* with the GNU Classpath Exception which is
+* available at https://www.gnu.org/software/classpath/license.html.
+*
+* SPDX-License-Identifier: EPL-2.0 OR GPL-2.0 WITH Classpath-exception-2.0
+********************************************************************************/
+"""
+
+from qrisp import QuantumCircuit, QFT, QuantumVariable
+
+
+def test_circuit_hash():
+    def build(angle=0.5, swap=False):
+        qc = QuantumCircuit(3)
+        qc.h(0)
+        if swap:
+            qc.cx(1, 0)
+        else:
+            qc.cx(0, 1)
+        qc.rz(angle, 2)
+
+        qv = QuantumVariable(3)
+        QFT(qv)
+        qft_gate = qv.qs.to_gate()
+        qc.append(qft_gate, qc.qubits)
+        qc.append(qft_gate, qc.qubits[::-1])
+        return qc
+
+    assert hash(build()) == hash(build())
+
+    # The hash depends on the qubits, the parameters and the order of the instructions
+    assert hash(build()) != hash(build(swap=True))
+    assert hash(build()) != hash(build(angle=0.25))
+
+    qc_0 = QuantumCircuit(2)
+    qc_0.x(0)
+    qc_0.y(1)
+    qc_1 = QuantumCircuit(2)
+    qc_1.y(1)
+    qc_1.x(0)
+    assert hash(qc_0) != hash(qc_1)
+
+    # The hash of a composite operation depends on its definition
+    qc_2 = qc_0.copy()
+    qc_2.append(qc_0.to_gate(name="composite"), qc_0.qubits)
+    qc_3 = qc_0.copy()
+    qc_3.append(qc_1.to_gate(name="composite"), qc_0.qubits)
+    assert hash(qc_2) != hash(qc_3)
@@ -0,0 +1,133 @@
+"""
+\********************************************************************************
+* Copyright (c) 2023 the Qrisp authors
+*
+* This program and the accompanying materials are made available under the
+* terms of the Eclipse Public License 2.0 which is available at
+* http://www.eclipse.org/legal/epl-2.0.
+*
+* This Source Code may also be made available under the following Secondary
+* Licenses when the conditions for such availability set forth in the Eclipse
+* Public License, v. 2.0 are satisfied: GNU General Public License, version 2
+* with the GNU Classpath Exception which is
+* available at https://www.gnu.org/software/classpath/license.html.
+*
+* SPDX-License-Identifier: EPL-2.0 OR GPL-2.0 WITH Classpath-exception-2.0
+********************************************************************************/
+"""
+
+import tempfile
+
+from qrisp import QuantumFloat, QuantumBool, CompilationCache, compilation_cache, h, mcx, cx
+from qrisp.core import compilation
+
+
+def build_session(size):
+    a = QuantumFloat(size)
+    b = QuantumFloat(size)
+    a[:] = 3
+    h(b[0])
+    a += b
+    c = a + b
+    d = c < 5
+    return d
+
+
+def test_compilation_cache():
+    compilation_cache.clear()
+
+    d_0 = build_session(4)
+    qc_0 = d_0.qs.compile()
+    assert compilation_cache.statistics()["misses"] > 0
+
+    # Structurally identical sessions are retrieved from the cache
+    d_1 = build_session(4)
+    hits = compilation_cache.hits
+    qc_1 = d_1.qs.compile()
+    assert compilation_cache.hits == hits + 1
+
+    assert str(qc_0) == str(qc_1)
+
+    # The compiled circuit refers to the qubits of the requesting session
+    assert set(d_1.reg).issubset(set(qc_1.qubits))
+    assert not set(d_0.reg).intersection(set(qc_1.qubits))
+
+    assert d_0.get_measurement() == d_1.get_measurement()
+
+    # Modifying the result does not modify the cache
+    qc_1.x(0)
+    qc_2 = build_session(4).qs.compile()
+    assert str(qc_0) == str(qc_2)
+
+    # Different keywords or sessions result in a new compilation
+    for kwargs in [{"workspace": 2}, {"intended_measurements": d_1.qs.qubits[:2]}]:
+        misses = compilation_cache.misses
+        d_1.qs.compile(**kwargs)
+        assert compilation_cache.misses == misses + 1
+
+    d_2 = build_session(5)
+    misses = compilation_cache.misses
+    d_2.qs.compile()
+    assert compilation_cache.misses == misses + 1
+
+
+def test_compilation_cache_bounds():
+    cache = CompilationCache(max_entries=2)
+
+    for i in range(2, 6):
+        qs = build_session(i).qs
+        qc = compilation.qompiler(qs)
+        key = cache.get_key(qs, 0, True, [], True, False, None, True)
+        cache.store(key, qs, qc)
+
+    assert cache.statistics()["entries"] == 2
+
+    # The least recently used entries have been removed
+    assert cache.lookup(key, qs) is not None
+    qs = build_session(2).qs
+    key = cache.get_key(qs, 0, True, [], True, False, None, True)
+    assert cache.lookup(key, qs) is None
+
+    cache = CompilationCache(max_instructions=50)
+    qs = build_session(4).qs
+    key = cache.get_key(qs, 0, True, [], True, False, None, True)
+    cache.store(key, qs, compilation.qompiler(qs))
+    assert cache.statistics()["entries"] == 0
+
+
+def test_compilation_cache_disk_tier():
+    with tempfile.TemporaryDirectory() as disk_path:
+        cache_0 = CompilationCache(disk_path=disk_path)
+        cache_1 = CompilationCache(disk_path=disk_path)
+
+        qs = build_session(3).qs
+        key = cache_0.get_key(qs, 0, True, [], True, False, None, True)
+        qc = cache_0.store(key, qs, compilation.qompiler(qs))
+
+        qs = build_session(3).qs
+        cached_qc = cache_1.lookup(key, qs)
+        assert cache_1.statistics()["disk_hits"] == 1
+        assert str(cached_qc) == str(qc)
+        assert set(qs.qubits).intersection(set(cached_qc.qubits))
+
+
+def test_uncachable_compilations():
+    compilation_cache.clear()
+
+    a = QuantumBool()
+    b = QuantumBool()
+    c = QuantumBool()
+    mcx([a, b], c)
+
+    # Compilations using automatic uncomputation depend on the state of the
+    # QuantumVariables
+    assert compilation_cache.get_key(a.qs, 0, False, [], True, False, None, True) is None
+
+    # gate_speed functions with closures can't be identified reliably
+    speed = 2
+    a.qs.compile(gate_speed=lambda op: speed)
+
+    assert compilation_cache.statistics()["entries"] == 0
+
+    a.qs.compile(gate_speed=lambda op: 2)
+    assert compilation_cache.statistics()["entries"] == 1
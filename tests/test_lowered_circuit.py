@@ -0,0 +1,135 @@
+"""
+\********************************************************************************
+* Copyright (c) 2023 the Qrisp authors
+*
+* This program and the accompanying materials are made available under the
+* terms of the Eclipse Public License 2.0 which is available at
+* http://www.eclipse.org/legal/epl-2.0.
+*
+* This Source Code may also be made available under the following Secondary
+* Licenses when the conditions for such availability set forth in the Eclipse
+* Public License, v. 2.0 are satisfied: GNU General Public License, version 2
+* with the GNU Classpath Exception which is
+* available at https://www.gnu.org/software/classpath/license.html.
+*
+* SPDX-License-Identifier: EPL-2.0 OR GPL-2.0 WITH Classpath-exception-2.0
+********************************************************************************/
+"""
+
+from qrisp import QuantumCircuit, QuantumFloat, XGate
+from qrisp.circuit import ClControlledOperation
+from qrisp.simulator.circuit_preprocessing import (
+    LoweredCircuit,
+    qc_to_int_list,
+    insert_multiverse_measurements,
+    Disentangler,
+    UNITARY_OPCODE,
+    DISENTANGLE_OPCODE,
+    MEASURE_OPCODE,
+    RESET_OPCODE,
+    CL_CONTROLLED_OPCODE,
+)
+
+
+# Reference implementation of the integer representation using qc.qubits.index
+def reference_int_list(qc):
+    res_list = []
+    for instr in qc.data:
+        qubit_int = 0
+        for qb in instr.qubits:
+            qubit_int |= 1 << qc.qubits.index(qb)
+        if instr.op.name in ["measure", "reset", "disentangle"] or isinstance(
+            instr.op, ClControlledOperation
+        ):
+            qubit_int *= -1
+        res_list.append(qubit_int)
+    return res_list
+
+
+def test_lowered_circuit():
+    qc = QuantumCircuit(4, 2)
+    qc.h(0)
+    qc.cx(0, 3)
+    qc.mcx([1, 2], 0)
+    qc.measure(3, 0)
+    qc.reset(3)
+    qc.append(Disentangler(), [qc.qubits[2]])
+    qc.append(ClControlledOperation(XGate()), [qc.qubits[1]], [qc.clbits[0]])
+    qc.measure(1, 1)
+
+    lowered_qc = LoweredCircuit(qc)
+
+    assert len(lowered_qc) == len(qc.data)
+    assert lowered_qc.opcodes == [
+        UNITARY_OPCODE,
+        UNITARY_OPCODE,
+        UNITARY_OPCODE,
+        MEASURE_OPCODE,
+        RESET_OPCODE,
+        DISENTANGLE_OPCODE,
+        CL_CONTROLLED_OPCODE,
+        MEASURE_OPCODE,
+    ]
+    assert lowered_qc.qubit_indices == [[0], [0, 3], [1, 2, 0], [3], [3], [2], [1], [1]]
+    assert lowered_qc.clbit_indices == [[], [], [], [0], [], [], [0], [1]]
+    assert lowered_qc.ops() == [instr.op for instr in qc.data]
+    assert lowered_qc.total_flops() == sum(2**len(instr.qubits) for instr in qc.data)
+    assert lowered_qc.qubit_ints() == reference_int_list(qc)
+
+    # Identical operation objects share their parameter slot
+    qc = QuantumCircuit(3)
+    disentangler = Disentangler()
+    for i in range(3):
+        qc.append(disentangler, [qc.qubits[i]])
+    lowered_qc = LoweredCircuit(qc)
+    assert lowered_qc.param_slots == [0, 0, 0]
+    assert len(lowered_qc.op_list) == 1
+
+    # Compare with the reference on an arithmetic circuit
+    a = QuantumFloat(4)
+    b = QuantumFloat(4)
+    a[:] = 3
+    b[:] = 5
+    c = a * b
+    qc = c.qs.compile().transpile()
+    qc.measure(qc.qubits[:3])
+    assert qc_to_int_list(qc) == reference_int_list(qc)
+
+
+def test_multiverse_measurement_reset_merging():
+    # The measurement on qubit 0 is followed by a reset, which is merged into the
+    # measurement
+    qc = QuantumCircuit(2, 2)
+    qc.h(0)
+    qc.measure(0, 0)
+    qc.reset(0)
+    qc.x(0)
+    qc.cx(0, 1)
+    qc.measure(1, 1)
+
+    index_dict = {qc.qubits[i]: i for i in range(len(qc.qubits))}
+    res_qc, measurements, lowered_qc = insert_multiverse_measurements(
+        qc.copy(), index_dict
+    )
+
+    op_names = [instr.op.name for instr in res_qc.data]
+    assert "reset" not in op_names
+    assert op_names.count("cx") == 3
+
+    # The added qubit has been registered in the index dictionary
+    assert len(res_qc.qubits) == 3
+    assert index_dict[res_qc.qubits[-1]] == 2
+
+    # The incrementally built lowering agrees with lowering the result
+    reference = LoweredCircuit(res_qc)
+    assert lowered_qc.opcodes == reference.opcodes
+    assert lowered_qc.qubit_indices == reference.qubit_indices
+    assert lowered_qc.ops() == reference.ops()
+
+    # The first measurement is performed on the added qubit
+    mes_dic = {instr.clbits[0]: index_dict[instr.qubits[0]] for instr in measurements}
+    assert mes_dic == {qc.clbits[0]: 2, qc.clbits[1]: 1}
+
+    res = qc.run(shots=None)
+    assert set(res.keys()) == {"10", "11"}
+    assert abs(res["10"] - res["11"]) < 10
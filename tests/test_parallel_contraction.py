@@ -0,0 +1,64 @@
+"""
+\********************************************************************************
+* Copyright (c) 2023 the Qrisp authors
+*
+* This program and the accompanying materials are made available under the
+* terms of the Eclipse Public License 2.0 which is available at
+* http://www.eclipse.org/legal/epl-2.0.
+*
+* This Source Code may also be made available under the following Secondary
+* Licenses when the conditions for such availability set forth in the Eclipse
+* Public License, v. 2.0 are satisfied: GNU General Public License, version 2
+* with the GNU Classpath Exception which is
+* available at https://www.gnu.org/software/classpath/license.html.
+*
+* SPDX-License-Identifier: EPL-2.0 OR GPL-2.0 WITH Classpath-exception-2.0
+********************************************************************************/
+"""
+
+import numpy as np
+
+from qrisp import QuantumFloat, h, QFT
+import qrisp.simulator.bi_arrays as bi_arrays
+from qrisp.simulator import DenseBiArray, tensordot, set_simulator_threads
+
+
+def test_parallel_contraction():
+    original_thread_amount = bi_arrays.simulator_threads
+
+    try:
+        set_simulator_threads(4)
+        # Enforce multithreading for small arrays
+        bi_arrays.multithreading_threshold = 2
+
+        rng = np.random.default_rng(0)
+
+        a = rng.random((4, 4)) + 1j * rng.random((4, 4))
+        b = rng.random((4, 2**10)) + 1j * rng.random((4, 2**10))
+
+        assert np.allclose(bi_arrays.parallel_matmul(a, b), a @ b)
+        assert np.allclose(bi_arrays.parallel_matmul(b.T, a), b.T @ a)
+        a, b = a.ravel(), b.ravel()
+        assert np.allclose(bi_arrays.parallel_outer(a, b), np.multiply.outer(a, b))
+        assert np.allclose(bi_arrays.parallel_outer(b, a), np.multiply.outer(b, a))
+
+        permuted_view = np.moveaxis(b.reshape(4, 2, 512), [0, 1, 2], [2, 0, 1])
+        assert np.all(bi_arrays.parallel_copy(permuted_view) == permuted_view)
+
+        # Contract with swapped axes
+        tensor = rng.random((2,) * 10)
+        matrix = rng.random((4, 4))
+        matrix = matrix.reshape(2, 2, 2, 2)
+        res = tensordot(DenseBiArray(matrix), DenseBiArray(tensor), ((2, 3), (3, 7)))
+        expected_res = np.tensordot(matrix, tensor, ((2, 3), (3, 7)))
+        assert np.allclose(res.to_array(), expected_res)
+
+        # Simulation
+        qf = QuantumFloat(6)
+        h(qf)
+        QFT(qf)
+        QFT(qf, inv=True)
+        assert len(qf.get_measurement()) == 64
+
+    finally:
+        set_simulator_threads(original_thread_amount)
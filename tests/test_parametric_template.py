@@ -0,0 +1,140 @@
+"""
+\********************************************************************************
+* Copyright (c) 2023 the Qrisp authors
+*
+* This program and the accompanying materials are made available under the
+* terms of the Eclipse Public License 2.0 which is available at
+* http://www.eclipse.org/legal/epl-2.0.
+*
+* This Source Code may also be made available under the following Secondary
+* Licenses when the conditions for such availability set forth in the Eclipse
+* Public License, v. 2.0 are satisfied: GNU General Public License, version 2
+* with the GNU Classpath Exception which is
+* available at https://www.gnu.org/software/classpath/license.html.
+*
+* SPDX-License-Identifier: EPL-2.0 OR GPL-2.0 WITH Classpath-exception-2.0
+********************************************************************************/
+"""
+
+import numpy as np
+import networkx as nx
+from sympy import Symbol, sin
+
+from qrisp import (
+    QuantumVariable,
+    QuantumFloat,
+    QuantumCircuit,
+    ParametricTemplate,
+    h,
+    rx,
+    rz,
+    p,
+    cx,
+)
+from qrisp.qaoa import (
+    QAOAProblem,
+    RX_mixer,
+    create_maxcut_cost_operator,
+    create_maxcut_cl_cost_function,
+)
+from qrisp.operators import X, Z
+
+
+def compare_dicts(dic_a, dic_b, tol=1e-4):
+    for key in set(dic_a.keys()).union(dic_b.keys()):
+        assert abs(dic_a.get(key, 0) - dic_b.get(key, 0)) < tol
+
+
+def test_parametric_template_binding():
+    a = Symbol("a")
+    b = Symbol("b")
+
+    qc = QuantumCircuit(2)
+    qc.h(0)
+    qc.rx(2 * a + 0.5, 0)
+    qc.cx(0, 1)
+    qc.p(-b, 1)
+    qc.rz(a - 3 * b, 0)
+    # Non-affine parameters are bound via bind_parameters
+    qc.ry(sin(a), 1)
+
+    template = ParametricTemplate(qc, [a, b])
+
+    assert template.symbols == [a, b]
+    assert len(template.param_ops) == 4
+    assert template.affine_indices.count(-1) == 1
+
+    for theta in [np.array([0.3, -1.2]), np.array([2.5, 0.1])]:
+        bound_qc = template.bind(theta)
+        reference_qc = qc.bind_parameters({a: theta[0], b: theta[1]})
+
+        assert not bound_qc.abstract_params
+        assert np.linalg.norm(
+            bound_qc.get_unitary() - reference_qc.get_unitary()
+        ) < 1e-5
+
+        # Dictionaries are also accepted
+        bound_ops = template.bind_operations({a: theta[0], b: theta[1]})
+        for op, reference_op in zip(bound_ops, template.bind_operations(theta)):
+            assert np.linalg.norm(op.get_unitary() - reference_op.get_unitary()) < 1e-6
+
+
+def test_parametric_template_measurement():
+    qv = QuantumVariable(3)
+    symbols = [Symbol("theta_" + str(i)) for i in range(3)]
+
+    h(qv)
+    for i in range(3):
+        rx(symbols[i], qv[i])
+    cx(qv[0], qv[1])
+    p(symbols[0] + symbols[2], qv[1])
+    rz(symbols[1], qv[2])
+    cx(qv[1], qv[2])
+    h(qv[2])
+
+    qc = qv.qs.compile()
+    template = ParametricTemplate(qc, symbols)
+
+    for _ in range(3):
+        theta = np.random.rand(3) * 2 * np.pi
+        subs_dic = {symbols[i]: theta[i] for i in range(3)}
+
+        res = qv.get_measurement(subs_dic=subs_dic, precompiled_qc=template, shots=None)
+        reference = qv.get_measurement(subs_dic=subs_dic, precompiled_qc=qc, shots=None)
+        compare_dicts(res, reference)
+
+    # The simulator preprocessing has only been performed once
+    assert len(template.prepared_circuits) == 1
+
+    # Hamiltonian measurement via the template
+    H = Z(0) * Z(1) + X(2) + 0.5 * Z(1)
+    theta = np.random.rand(3) * 2 * np.pi
+    subs_dic = {symbols[i]: theta[i] for i in range(3)}
+
+    res = H.get_measurement(qv, subs_dic=subs_dic, precompiled_qc=template, precision=0.001)
+    reference = H.get_measurement(qv, subs_dic=subs_dic, precompiled_qc=qc, precision=0.001)
+    assert abs(res - reference) < 0.05
+
+
+def test_qaoa_with_parametric_template():
+    G = nx.erdos_renyi_graph(6, 0.5, seed=3)
+    qarg = QuantumVariable(G.number_of_nodes())
+
+    problem = QAOAProblem(
+        create_maxcut_cost_operator(G),
+        RX_mixer,
+        create_maxcut_cl_cost_function(G),
+    )
+
+    qc, symbols = problem.compile_circuit(qarg, 2)
+    template = ParametricTemplate(qc, symbols)
+
+    theta = np.random.rand(len(symbols))
+    subs_dic = {symbols[i]: theta[i] for i in range(len(symbols))}
+
+    res = qarg.get_measurement(subs_dic=subs_dic, precompiled_qc=template, shots=None)
+    reference = qarg.get_measurement(subs_dic=subs_dic, precompiled_qc=qc, shots=None)
+    compare_dicts(res, reference)
+
+    res = problem.run(qarg, 2, max_iter=10)
+    assert abs(sum(res.values()) - 1) < 1e-3
@@ -0,0 +1,115 @@
+"""
+\********************************************************************************
+* Copyright (c) 2023 the Qrisp authors
+*
+* This program and the accompanying materials are made available under the
+* terms of the Eclipse Public License 2.0 which is available at
+* http://www.eclipse.org/legal/epl-2.0.
+*
+* This Source Code may also be made available under the following Secondary
+* Licenses when the conditions for such availability set forth in the Eclipse
+* Public License, v. 2.0 are satisfied: GNU General Public License, version 2
+* with the GNU Classpath Exception which is
+* available at https://www.gnu.org/software/classpath/license.html.
+*
+* SPDX-License-Identifier: EPL-2.0 OR GPL-2.0 WITH Classpath-exception-2.0
+********************************************************************************/
+"""
+
+import numpy as np
+import networkx as nx
+from sympy import Symbol
+
+from qrisp import QuantumVariable, QuantumFloat, QuantumCircuit, ParametricTemplate, h, ry, cx, rx
+from qrisp.simulator import run
+from qrisp.misc import get_measurement_from_qc
+from qrisp.default_backend import def_backend
+from qrisp.qaoa import create_maxcut_cl_cost_function
+
+
+def test_simulator_probability_arrays():
+    
+    qc = QuantumCircuit(3, 3)
+    qc.h(0)
+    qc.cx(0, 1)
+    qc.x(2)
+    qc.measure(range(3), range(3))
+    
+    counts = run(qc, None)
+    outcome_array, probability_array = run(qc, None, return_arrays=True)
+    
+    assert outcome_array.dtype == np.int64
+    
+    for outcome, p in zip(outcome_array, probability_array):
+        assert counts[bin(outcome)[2:].zfill(3)] == round(p*100000)
+    
+    outcome_array, count_array = run(qc, 1000, return_arrays=True)
+    
+    assert set(outcome_array) <= {int("100", 2), int("111", 2)}
+    assert np.sum(count_array) == 1000
+
+
+def test_get_measurement_arrays():
+    
+    qf = QuantumFloat(4)
+    h(qf[0])
+    ry(0.7, qf[2])
+    cx(qf[2], qf[3])
+    
+    mes_res = qf.get_measurement()
+    outcome_array, probability_array = qf.get_measurement(return_arrays = True)
+    
+    assert np.abs(np.sum(probability_array) - 1) < 1E-10
+    
+    for outcome, p in zip(outcome_array, probability_array):
+        if p > 1E-10:
+            assert abs(mes_res[qf.decoder(outcome)] - p) < 1E-4
+    
+    # Circuits containing other measurements are processed via the counts dictionary
+    qc = QuantumCircuit(3, 1)
+    qc.h(0)
+    qc.cx(0, 1)
+    qc.h(2)
+    qc.measure(2, 0)
+    
+    outcome_array, probability_array = get_measurement_from_qc(qc, qc.qubits[:2], def_backend, 
+                                                               return_arrays = True)
+    
+    assert set(outcome_array) == {0, 3}
+    assert np.all(np.abs(probability_array - 0.5) < 1E-4)
+    
+    # ParametricTemplate path
+    phi = Symbol("phi")
+    qv = QuantumVariable(3)
+    h(qv[0])
+    rx(phi, qv[1])
+    cx(qv[1], qv[2])
+    
+    qc = qv.qs.compile(intended_measurements = qv.reg)
+    template = ParametricTemplate(qc, [phi])
+    
+    for phi_val in [0.3, 1.2]:
+        mes_res = qv.get_measurement(subs_dic = {phi : phi_val}, precompiled_qc = template)
+        outcome_array, probability_array = qv.get_measurement(subs_dic = {phi : phi_val}, 
+                                                              precompiled_qc = template, 
+                                                              return_arrays = True)
+        
+        for outcome, p in zip(outcome_array, probability_array):
+            if p > 1E-10:
+                assert abs(mes_res[qv.decoder(outcome)] - p) < 1E-4
+
+
+def test_maxcut_cost_function_arrays():
+    
+    G = nx.erdos_renyi_graph(6, 0.5, seed = 10)
+    cl_cost_function = create_maxcut_cl_cost_function(G)
+    
+    qv = QuantumVariable(6)
+    h(qv)
+    ry(0.4, qv[2])
+    cx(qv[2], qv[4])
+    
+    counts = qv.get_measurement()
+    arrays = qv.get_measurement(return_arrays = True)
+    
+    assert abs(cl_cost_function(counts) - cl_cost_function(arrays)) < 1E-3
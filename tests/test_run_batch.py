@@ -0,0 +1,68 @@
+"""
+\********************************************************************************
+* Copyright (c) 2023 the Qrisp authors
+*
+* This program and the accompanying materials are made available under the
+* terms of the Eclipse Public License 2.0 which is available at
+* http://www.eclipse.org/legal/epl-2.0.
+*
+* This Source Code may also be made available under the following Secondary
+* Licenses when the conditions for such availability set forth in the Eclipse
+* Public License, v. 2.0 are satisfied: GNU General Public License, version 2
+* with the GNU Classpath Exception which is
+* available at https://www.gnu.org/software/classpath/license.html.
+*
+* SPDX-License-Identifier: EPL-2.0 OR GPL-2.0 WITH Classpath-exception-2.0
+********************************************************************************/
+"""
+
+import numpy as np
+from sympy import Symbol
+
+from qrisp import QuantumCircuit, QuantumFloat, ParametricTemplate, h, rx, ry, cx
+from qrisp.simulator import run, run_batch
+from qrisp.default_backend import def_backend
+
+
+def test_run_batch():
+    a = QuantumFloat(3)
+    h(a)
+    b = a * a
+
+    symbols = [Symbol("theta_" + str(i)) for i in range(3)]
+    for i in range(3):
+        rx(symbols[i], b[i])
+    cx(b[0], b[1])
+    ry(symbols[0] - symbols[2], b[2])
+
+    qc = b.qs.compile()
+    qc.measure(b.reg)
+
+    parameters = np.random.rand(4, 3) * 2 * np.pi
+
+    template = ParametricTemplate(qc, symbols)
+    res = run_batch(template, parameters)
+
+    # The state preparation is independent of the parameters
+    prepared_template = template.prepared_circuits[None]
+    assert prepared_template.prefix_length > 0
+
+    assert len(res) == 4
+    for i in range(4):
+        reference = run(qc.bind_parameters(dict(zip(symbols, parameters[i]))), None)
+        for key in set(res[i].keys()).union(reference.keys()):
+            assert abs(res[i].get(key, 0) - reference.get(key, 0)) <= 10
+
+    # Dictionaries, processes and the backend method give the same result
+    subs_dics = [dict(zip(symbols, theta)) for theta in parameters]
+    assert run_batch(qc, subs_dics, symbols=symbols) == res
+    assert run_batch(template, parameters, processes=2) == res
+    assert def_backend.run_batch(template, parameters) == res
+
+    # Sampled results are in order
+    qc = QuantumCircuit(1, 1)
+    phi = Symbol("phi")
+    qc.rx(phi, 0)
+    qc.measure(0, 0)
+    res = run_batch(qc, [{phi: np.pi * (i % 2)} for i in range(6)], shots=100, processes=2)
+    assert res == [{"0": 100}, {"1": 100}] * 3